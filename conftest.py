@@ -0,0 +1,36 @@
+import asyncio
+import os
+
+import pytest
+
+from src.tests import postgres
+
+# хуки лежат в корне репозитория: conftest.py из src/tests главный процесс
+# xdist не загружает, если pytest запущен без путей
+TEST_DATABASE = os.getenv("TEST_DATABASE", "sqlite")
+
+_cluster = None
+
+
+def pytest_configure(config):
+    global _cluster
+
+    # кластер и шаблон поднимает только главный процесс, воркеры xdist
+    # получают адрес сервера через окружение
+    if TEST_DATABASE != "postgres" or hasattr(config, "workerinput"):
+        return
+
+    if not os.getenv("TEST_DATABASE_URL"):
+        try:
+            _cluster = postgres.PostgresCluster()
+        except RuntimeError as e:
+            raise pytest.UsageError(str(e))
+        _cluster.start()
+        os.environ["TEST_DATABASE_URL"] = _cluster.url
+
+    asyncio.run(postgres.create_template(os.environ["TEST_DATABASE_URL"]))
+
+
+def pytest_unconfigure(config):
+    if _cluster is not None:
+        _cluster.stop()
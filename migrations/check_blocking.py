@@ -0,0 +1,261 @@
+"""Ищет в ревизиях операции, которые надолго блокируют таблицы.
+
+Использование:
+    python -m migrations.check_blocking [path ...]
+
+Без аргументов проверяются все файлы migrations/versions. Операция,
+которую осознанно оставили как есть, помечается комментарием
+``# migration-check: ignore`` на той же строке.
+"""
+import ast
+import sys
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+VERSIONS_DIR = Path(__file__).parent / "versions"
+
+IGNORE_MARKER = "migration-check: ignore"
+
+HELPERS = frozenset(
+    {
+        "create_index_concurrently",
+        "drop_index_concurrently",
+        "with_lock_timeout",
+        "batched_backfill",
+    }
+)
+
+BLOCKING_SQL = (
+    ("VACUUM FULL", "VACUUM FULL rewrites the table under ACCESS EXCLUSIVE"),
+    ("CLUSTER", "CLUSTER rewrites the table under ACCESS EXCLUSIVE"),
+    ("LOCK TABLE", "explicit LOCK TABLE blocks concurrent queries"),
+    ("SET NOT NULL", "SET NOT NULL scans the table under ACCESS EXCLUSIVE"),
+)
+
+
+class Finding(NamedTuple):
+    path: Path
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}: {self.message}"
+
+
+def call_name(node: ast.Call) -> Optional[str]:
+    func = node.func
+    if (
+        isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "op"
+    ):
+        return func.attr
+
+    return None
+
+
+def helper_name(node: ast.Call) -> Optional[str]:
+    if isinstance(node.func, ast.Name) and node.func.id in HELPERS:
+        return node.func.id
+
+    return None
+
+
+def keyword(node: ast.Call, name: str) -> Optional[ast.expr]:
+    for kw in node.keywords:
+        if kw.arg == name:
+            return kw.value
+
+    return None
+
+
+def is_true(node: Optional[ast.expr]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is True
+
+
+def is_false(node: Optional[ast.expr]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is False
+
+
+def literal(node: Optional[ast.expr]) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+
+    return None
+
+
+def table_arg(node: ast.Call, position: int) -> Optional[str]:
+    if len(node.args) > position:
+        return literal(node.args[position])
+
+    return literal(keyword(node, "table_name"))
+
+
+def autocommit_calls(tree: ast.AST) -> set[int]:
+    # вызовы внутри with op.get_context().autocommit_block():
+    inside = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.With) and any(
+            isinstance(item.context_expr, ast.Call)
+            and isinstance(item.context_expr.func, ast.Attribute)
+            and item.context_expr.func.attr == "autocommit_block"
+            for item in node.items
+        ):
+            inside.update(id(inner) for inner in ast.walk(node))
+
+    return inside
+
+
+def check_call(
+    node: ast.Call, new_tables: set[str], in_autocommit: bool = False
+) -> Iterator[str]:
+    name = call_name(node)
+    concurrently = is_true(keyword(node, "postgresql_concurrently"))
+
+    if name in ("create_index", "drop_index") and concurrently and not in_autocommit:
+        # ревизия выполняется в транзакции, а CONCURRENTLY в ней запрещён
+        yield (
+            f"{name} with postgresql_concurrently=True fails inside the revision "
+            f"transaction; use {name}_concurrently"
+        )
+
+    elif name == "create_index":
+        table = table_arg(node, 1)
+        if table not in new_tables and not concurrently:
+            yield (
+                f"create_index on existing table {table!r} takes a SHARE lock "
+                "for the whole build; use create_index_concurrently"
+            )
+
+    elif name == "drop_index":
+        if not concurrently:
+            yield "drop_index takes ACCESS EXCLUSIVE; use drop_index_concurrently"
+
+    elif name == "add_column":
+        table = table_arg(node, 0)
+        column = node.args[1] if len(node.args) > 1 else keyword(node, "column")
+        if (
+            table not in new_tables
+            and isinstance(column, ast.Call)
+            and is_false(keyword(column, "nullable"))
+            and keyword(column, "server_default") is None
+        ):
+            yield (
+                f"NOT NULL column without server_default on {table!r}; add it "
+                "nullable, backfill with batched_backfill, then add the constraint"
+            )
+
+    elif name == "alter_column":
+        table = table_arg(node, 0)
+        if keyword(node, "type_") is not None:
+            yield f"alter_column type_ on {table!r} rewrites the table"
+        if is_false(keyword(node, "nullable")):
+            yield (
+                f"alter_column nullable=False on {table!r} scans the table under "
+                "ACCESS EXCLUSIVE; add a CHECK ... NOT VALID and validate it instead"
+            )
+
+    elif name == "create_foreign_key":
+        if not is_true(keyword(node, "postgresql_not_valid")):
+            yield (
+                "create_foreign_key validates all rows under lock; "
+                "use postgresql_not_valid=True and VALIDATE CONSTRAINT later"
+            )
+
+    elif name in ("create_unique_constraint", "create_primary_key"):
+        table = table_arg(node, 1)
+        if table not in new_tables:
+            yield (
+                f"{name} on existing table {table!r} builds an index under lock; "
+                "build a unique index concurrently and attach it with USING INDEX"
+            )
+
+    elif name == "execute":
+        sql = literal(node.args[0]) if node.args else None
+        if sql is None:
+            return
+
+        upper = " ".join(sql.upper().split())
+        if "CREATE INDEX" in upper or "CREATE UNIQUE INDEX" in upper:
+            if "CONCURRENTLY" not in upper:
+                yield "raw CREATE INDEX without CONCURRENTLY"
+        for pattern, message in BLOCKING_SQL:
+            if pattern in upper:
+                yield message
+
+
+def check_file(path: Path) -> list[Finding]:
+    source = path.read_text()
+    lines = source.splitlines()
+    tree = ast.parse(source, filename=str(path))
+
+    upgrade = next(
+        (
+            node
+            for node in tree.body
+            if isinstance(node, ast.FunctionDef) and node.name == "upgrade"
+        ),
+        None,
+    )
+    if upgrade is None:
+        return []
+
+    calls = [node for node in ast.walk(upgrade) if isinstance(node, ast.Call)]
+    new_tables = {
+        table
+        for node in calls
+        if call_name(node) == "create_table"
+        and (table := table_arg(node, 0)) is not None
+    }
+
+    # CONCURRENTLY выполняется вне транзакции ревизии и фиксирует всё, что
+    # было сделано до него: если сборка упадёт, ревизия останется без отметки
+    # в alembic_version, а повтор споткнётся об уже созданные таблицы
+    migration_calls = [node for node in calls if call_name(node) or helper_name(node)]
+    shares_revision = len(migration_calls) > 1
+
+    # между попытками with_lock_timeout спит, а блокировки, взятые ревизией
+    # до него, всё это время держатся и останавливают запись в таблицы
+    first_line = min((node.lineno for node in migration_calls), default=0)
+    autocommit = autocommit_calls(upgrade)
+
+    findings = []
+    for node in sorted(calls, key=lambda n: n.lineno):
+        if IGNORE_MARKER in lines[node.lineno - 1]:
+            continue
+        for message in check_call(node, new_tables, id(node) in autocommit):
+            findings.append(Finding(path, node.lineno, message))
+        if helper_name(node) == "with_lock_timeout" and node.lineno > first_line:
+            findings.append(
+                Finding(
+                    path,
+                    node.lineno,
+                    "with_lock_timeout retries while the revision holds the locks "
+                    "of earlier operations; make it the first operation",
+                )
+            )
+        if shares_revision and helper_name(node) == "create_index_concurrently":
+            findings.append(
+                Finding(
+                    path,
+                    node.lineno,
+                    "create_index_concurrently commits the preceding operations "
+                    "of the revision; move it into a revision of its own",
+                )
+            )
+
+    return findings
+
+
+def main(argv: list[str]) -> int:
+    paths = [Path(arg) for arg in argv] or sorted(VERSIONS_DIR.glob("*.py"))
+
+    findings = [finding for path in paths for finding in check_file(path)]
+    for finding in findings:
+        print(finding)
+
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
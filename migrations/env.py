@@ -32,6 +32,12 @@ target_metadata = Base.metadata  # UPDATED
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# guards against long blocking DDL: a migration that cannot get its lock
+# quickly fails instead of queueing every application query behind it.
+# 0 disables the guard.
+lock_timeout_ms = int(os.getenv("MIGRATION_LOCK_TIMEOUT_MS", "5000"))
+statement_timeout_ms = int(os.getenv("MIGRATION_STATEMENT_TIMEOUT_MS", "0"))
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -51,6 +57,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -58,7 +65,20 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    if connection.dialect.name == "postgresql":
+        # session-level settings, so they survive autocommit blocks
+        # used by CREATE INDEX CONCURRENTLY (see migrations/helpers.py)
+        connection.exec_driver_sql(f"SET lock_timeout = {lock_timeout_ms}")
+        connection.exec_driver_sql(f"SET statement_timeout = {statement_timeout_ms}")
+        connection.commit()
+
+    # each revision runs in its own transaction, which lets a revision
+    # step out of it with op.get_context().autocommit_block()
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,167 @@
+import logging
+import time
+from typing import Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger("alembic.helpers")
+
+# SQLSTATE lock_not_available: не дождались блокировки за lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def is_postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def is_offline() -> bool:
+    return op.get_context().as_sql
+
+
+def create_index_concurrently(
+    index_name: str, table_name: str, columns: Sequence[str], **kw
+) -> None:
+    """CREATE INDEX CONCURRENTLY вне транзакции миграции.
+
+    Не блокирует запись в таблицу. Уже построенный индекс пропускается,
+    невалидный (остался от упавшей попытки) сначала удаляется.
+    """
+    if not is_postgres():
+        op.create_index(index_name, table_name, columns, **kw)
+        return
+
+    is_valid, lock_timeout = None, "0"
+    if not is_offline():
+        bind = op.get_bind()
+        is_valid = bind.execute(
+            sa.text(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ),
+            {"name": index_name},
+        ).scalar()
+        if is_valid:
+            return
+
+        lock_timeout = bind.execute(sa.text("SHOW lock_timeout")).scalar()
+
+    with op.get_context().autocommit_block():
+        # ожидание старых транзакций здесь не мешает записи, lock_timeout не нужен
+        op.execute("SET lock_timeout = 0")
+        try:
+            if is_valid is False:
+                op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+            op.create_index(
+                index_name, table_name, columns, postgresql_concurrently=True, **kw
+            )
+        finally:
+            op.execute(f"SET lock_timeout = '{lock_timeout}'")
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    if not is_postgres():
+        op.drop_index(index_name, table_name=table_name)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def with_lock_timeout(
+    operation: Callable[[], None],
+    lock_timeout_ms: int = 2000,
+    statement_timeout_ms: Optional[int] = None,
+    retries: int = 5,
+    backoff: float = 1.0,
+) -> None:
+    """Выполняет DDL с коротким lock_timeout и повторяет его при неудаче.
+
+    ACCESS EXCLUSIVE, который ждёт в очереди, блокирует всех, кто пришёл
+    после него, поэтому лучше быстро сдаться и попробовать ещё раз.
+    Каждая попытка идёт в своей точке сохранения, а блокировки, взятые
+    ревизией раньше, точка сохранения не отпускает и держит их всё время
+    ожидания между попытками. Поэтому вызов должен быть первой операцией
+    ревизии, это проверяет check_blocking.
+    """
+    if not is_postgres():
+        operation()
+        return
+
+    if is_offline():
+        op.execute(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+        operation()
+        return
+
+    bind = op.get_bind()
+    for attempt in range(1, retries + 1):
+        savepoint = bind.begin_nested()
+        try:
+            bind.execute(sa.text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+            if statement_timeout_ms is not None:
+                bind.execute(
+                    sa.text(
+                        f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}"
+                    )
+                )
+            operation()
+        except DBAPIError as exc:
+            savepoint.rollback()
+            if (
+                getattr(exc.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE
+                or attempt == retries
+            ):
+                raise
+            logger.warning(
+                "lock_timeout, attempt %s of %s, retrying in %.1fs",
+                attempt,
+                retries,
+                backoff * attempt,
+            )
+            time.sleep(backoff * attempt)
+        else:
+            savepoint.commit()
+            return
+
+
+def batched_backfill(
+    table_name: str,
+    set_clause: str,
+    where: str,
+    batch_size: int = 1000,
+    pk: str = "id",
+    pause: float = 0.0,
+) -> int:
+    """Заполняет колонку пачками, каждая пачка в своей транзакции.
+
+    where должно перестать выполняться для обновлённых строк
+    (например, "score IS NULL"), иначе цикл не закончится.
+    """
+    if is_offline():
+        op.execute(f"UPDATE {table_name} SET {set_clause} WHERE {where}")
+        return 0
+
+    stmt = sa.text(
+        f"UPDATE {table_name} SET {set_clause} "
+        f"WHERE {pk} IN (SELECT {pk} FROM {table_name} WHERE {where} "
+        f"ORDER BY {pk} LIMIT :batch_size)"
+    )
+
+    total = 0
+    with op.get_context().autocommit_block():
+        while True:
+            updated = op.get_bind().execute(stmt, {"batch_size": batch_size}).rowcount
+            total += updated
+            if updated < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+    logger.info("backfilled %s rows in %s", total, table_name)
+    return total
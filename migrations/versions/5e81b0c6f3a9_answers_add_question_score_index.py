@@ -0,0 +1,29 @@
+"""answers: add question_id, score, id index
+
+Revision ID: 5e81b0c6f3a9
+Revises: b174f63fb474
+Create Date: 2026-10-19 14:32:29.774051
+
+"""
+from typing import Sequence, Union
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e81b0c6f3a9'
+down_revision: Union[str, Sequence[str], None] = 'b174f63fb474'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # отдельная ревизия: CONCURRENTLY идёт вне транзакции и фиксирует всё,
+    # что ревизия сделала до него
+    create_index_concurrently('ix_answers_question_score', 'answers', ['question_id', 'score', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_answers_question_score', table_name='answers')
@@ -0,0 +1,29 @@
+"""questions: add created_at, id index
+
+Revision ID: 9c3e5a7d41b2
+Revises: 2fae55122f85
+Create Date: 2026-10-19 12:11:03.208417
+
+"""
+from typing import Sequence, Union
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5a7d41b2'
+down_revision: Union[str, Sequence[str], None] = '2fae55122f85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # отдельная ревизия: CONCURRENTLY идёт вне транзакции и фиксирует всё,
+    # что ревизия сделала до него
+    create_index_concurrently('ix_questions_created_at_id', 'questions', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_questions_created_at_id', table_name='questions')
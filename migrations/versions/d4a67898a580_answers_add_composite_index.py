@@ -21,7 +21,7 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.create_index('ix_answer_question_user', 'answers', ['question_id', 'user_id'], unique=False)
+    op.create_index('ix_answer_question_user', 'answers', ['question_id', 'user_id'], unique=False)  # migration-check: ignore (already applied)
     # ### end Alembic commands ###
 
 
@@ -0,0 +1,271 @@
+import os
+import zlib
+from typing import Optional
+
+from fastapi import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+
+LEVELS = {
+    "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),
+    "br": int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4")),
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+}
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+)
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# порядок важен: при равных q выбираем то, что раньше в словаре
+COMPRESSORS = {
+    name: compressor
+    for name, compressor, available in (
+        ("zstd", ZstdCompressor, zstandard is not None),
+        ("br", BrotliCompressor, brotli is not None),
+        ("gzip", GzipCompressor, True),
+    )
+    if available
+}
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    weights: dict[str, float] = {}
+
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in COMPRESSORS:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+
+    return best
+
+
+def compress_body(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = COMPRESSORS[encoding](LEVELS[encoding] if level is None else level)
+    return compressor.compress(body) + compressor.finish()
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.split(";")[
+        0
+    ].endswith("+json")
+
+
+# запись для кэша ответов: тело сжимается каждым алгоритмом не больше одного раза
+class PrecompressedBody:
+    def __init__(
+        self,
+        body: bytes,
+        media_type: str = "application/json",
+        minimum_size: int = MIN_SIZE,
+    ):
+        self.body = body
+        self.media_type = media_type
+        self.minimum_size = minimum_size
+        self._encoded: dict[str, bytes] = {}
+
+    def encode(self, encoding: str) -> bytes:
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            encoded = compress_body(self.body, encoding)
+            self._encoded[encoding] = encoded
+
+        return encoded
+
+    def to_response(
+        self,
+        accept_encoding: str,
+        status_code: int = 200,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Response:
+        encoding = select_encoding(accept_encoding)
+
+        if encoding is None or len(self.body) < self.minimum_size:
+            response = Response(self.body, status_code, headers, self.media_type)
+        else:
+            response = Response(
+                self.encode(encoding), status_code, headers, self.media_type
+            )
+            response.headers["Content-Encoding"] = encoding
+
+        response.headers.add_vary_header("Accept-Encoding")
+
+        return response
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = MIN_SIZE,
+        levels: Optional[dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {**LEVELS, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(
+            self.app, encoding, self.levels[encoding], self.minimum_size
+        )
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, level: int, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.passthrough = "content-encoding" in headers or not is_compressible(
+                headers.get("content-type", "")
+            )
+            return
+
+        if message_type != "http.response.body":
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self.send_chunk(body, more_body)
+            return
+
+        if self.start_message is None:
+            await self.send(message)
+            return
+
+        start_message, self.start_message = self.start_message, None
+
+        if self.passthrough or (not more_body and len(body) < self.minimum_size):
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        self.compressor = COMPRESSORS[self.encoding](self.level)
+
+        if more_body:
+            # стриминг: длина заранее неизвестна, каждый кусок сбрасываем сразу
+            del headers["Content-Length"]
+            await self.send(start_message)
+            await self.send_chunk(body, more_body=True)
+            return
+
+        body = self.compressor.compress(body) + self.compressor.finish()
+        headers["Content-Length"] = str(len(body))
+        await self.send(start_message)
+        await self.send({"type": "http.response.body", "body": body})
+
+    async def send_chunk(self, body: bytes, more_body: bool) -> None:
+        chunk = self.compressor.compress(body)
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
+from pydantic import TypeAdapter
+from typing import Annotated, Literal, Optional
+from src.app.compression import PrecompressedBody
+from src.app.pagination import decode_cursor, encode_cursor
+from src.db.feed import FEED_PAGES, feed_snapshot
 from src.db.db_repository import (
     QuestionsRepository,
     make_q_repository,
     AnswersRepository,
+    AnswerNotFound,
     make_a_repository,
 )
 
@@ -12,17 +18,52 @@ from src.app.schemas import (
     QuestionWithAnswersResponse,
     CreateAnswerParams,
     AnswerResponse,
+    TagCountResponse,
+    VoteParams,
+    VoteResponse,
+    FeedItemResponse,
 )
 
 
 router = APIRouter()
 
+feed_items_adapter = TypeAdapter(list[FeedItemResponse])
+
+
+def render_feed_page(items: list[dict]) -> PrecompressedBody:
+    return PrecompressedBody(
+        feed_items_adapter.dump_json(feed_items_adapter.validate_python(items))
+    )
+
 
 @router.get("/questions/")
 async def get_questions(
+    response: Response,
+    tag: Annotated[list[str], Query()] = [],
+    match: Literal["all", "any"] = "all",
+    limit: Annotated[Optional[int], Query(ge=1, le=100)] = None,
+    cursor: Optional[str] = None,
     q_repository: QuestionsRepository = Depends(make_q_repository),
 ) -> list[QuestionResponse]:
-    questions = await q_repository.get_questions()
+    tags = [t.strip().lower() for t in tag if t.strip()]
+    after = decode_cursor(cursor) if cursor else None
+    questions = None
+
+    if not tags and limit is not None:
+        questions = await q_repository.get_feed_window(after, limit + 1)
+
+    if questions is None:
+        questions = await q_repository.get_questions(
+            tags=tags,
+            match_all=match == "all",
+            limit=limit + 1 if limit is not None else None,
+            after=after,
+        )
+
+    if limit is not None and len(questions) > limit:
+        questions = questions[:limit]
+        last = QuestionResponse.model_validate(questions[-1])
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
 
     return [QuestionResponse.model_validate(q) for q in questions]
 
@@ -32,11 +73,35 @@ async def create_question(
     payload: QuestionCreateParams,
     q_repository: QuestionsRepository = Depends(make_q_repository),
 ) -> QuestionResponse:
-    new_question = await q_repository.create_questions(payload.text)
+    new_question = await q_repository.create_questions(payload.text, payload.tags)
 
     return QuestionResponse.model_validate(new_question)
 
 
+@router.get("/feed/", response_model=list[FeedItemResponse])
+async def get_feed(
+    request: Request,
+    # дальше снимка лента не листается: глубже — GET /questions/ с курсором
+    page: Annotated[int, Query(ge=0, le=FEED_PAGES - 1)] = 0,
+    q_repository: QuestionsRepository = Depends(make_q_repository),
+) -> Response:
+    body = await q_repository.get_feed_page_body(page, render_feed_page)
+
+    return body.to_response(
+        request.headers.get("accept-encoding", ""),
+        headers={"X-Feed-Snapshot-Age": f"{feed_snapshot.age:.3f}"},
+    )
+
+
+@router.get("/tags/")
+async def get_tag_counts(
+    q_repository: QuestionsRepository = Depends(make_q_repository),
+) -> list[TagCountResponse]:
+    counts = await q_repository.get_tag_counts()
+
+    return [TagCountResponse(name=name, count=count) for name, count in counts]
+
+
 @router.get("/questions/{question_id}")
 async def get_questions_with_answers(
     question_id: int, q_repository: QuestionsRepository = Depends(make_q_repository)
@@ -92,6 +157,30 @@ async def get_answer(
     return AnswerResponse.model_validate(answer)
 
 
+@router.post("/answers/{answer_id}/vote", status_code=status.HTTP_201_CREATED)
+async def vote_answer(
+    answer_id: int,
+    payload: VoteParams,
+    a_repository: AnswersRepository = Depends(make_a_repository),
+) -> VoteResponse:
+    answer = await a_repository.get_answer_by_id(answer_id)
+
+    if answer is None:
+        raise HTTPException(status_code=404, detail="answer_not_found")
+
+    try:
+        vote = await a_repository.vote(
+            a_id=answer_id, user_id=payload.user_id, value=payload.value
+        )
+    except AnswerNotFound:
+        raise HTTPException(status_code=404, detail="answer_not_found")
+
+    if vote is None:
+        raise HTTPException(status_code=409, detail="vote_already_exists")
+
+    return VoteResponse.model_validate(vote)
+
+
 @router.delete("/answers/{answer_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_answer(
     answer_id: int, a_repository: AnswersRepository = Depends(make_a_repository)
@@ -0,0 +1,149 @@
+import os
+import time
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db.db_config import REQUEST_DEADLINE, DeadlineExceeded, request_deadline
+
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# служебные маршруты (профилирование) не ограничиваются: иначе на перегруженный
+# воркер не зайти, а долгий захват профиля уронил бы лимит
+EXEMPT_PREFIXES = ("/admin/",)
+
+# SQLSTATE query_canceled: Postgres прервал запрос по statement_timeout
+QUERY_CANCELED = "57014"
+
+RETRY_AFTER = int(os.getenv("RETRY_AFTER_SECONDS", "1"))
+
+
+class AIMDLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        latency_target: float,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        backoff: float = 0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.latency_target = latency_target
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.in_flight = 0
+        self._decreased_at = float("-inf")
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, dropped: bool = False) -> None:
+        in_flight = self.in_flight
+        self.in_flight -= 1
+
+        if dropped or latency > self.latency_target:
+            # одна перегрузка задевает все запросы, которые шли в этот момент:
+            # лимит снижается только по запросам, начатым после прошлого снижения
+            now = time.monotonic()
+            if now - latency >= self._decreased_at:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._decreased_at = now
+        elif in_flight * 2 >= self.limit:
+            # лимит растёт, только если он действительно используется
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+
+def make_limiter(kind: str, initial_limit: int, latency_target_ms: int) -> AIMDLimiter:
+    prefix = f"CONCURRENCY_{kind.upper()}"
+    return AIMDLimiter(
+        initial_limit=int(os.getenv(f"{prefix}_LIMIT", str(initial_limit))),
+        latency_target=int(
+            os.getenv(f"{prefix}_LATENCY_TARGET_MS", str(latency_target_ms))
+        )
+        / 1000,
+        min_limit=int(os.getenv(f"{prefix}_MIN_LIMIT", "1")),
+        max_limit=int(os.getenv(f"{prefix}_MAX_LIMIT", "1000")),
+    )
+
+
+def is_overload_error(exc: Exception) -> bool:
+    # не дождались соединения из пула за pool_timeout
+    if isinstance(exc, (DeadlineExceeded, PoolTimeout)):
+        return True
+
+    return (
+        isinstance(exc, DBAPIError)
+        and getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
+    )
+
+
+class AdaptiveConcurrencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        read_limiter: Optional[AIMDLimiter] = None,
+        write_limiter: Optional[AIMDLimiter] = None,
+        deadline: float = REQUEST_DEADLINE,
+        retry_after: int = RETRY_AFTER,
+    ):
+        self.app = app
+        self.read_limiter = read_limiter or make_limiter("read", 100, 250)
+        self.write_limiter = write_limiter or make_limiter("write", 20, 500)
+        self.deadline = deadline
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = (
+            self.read_limiter
+            if scope["method"] in READ_METHODS
+            else self.write_limiter
+        )
+
+        if not limiter.try_acquire():
+            await self.reject(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        started = time.monotonic()
+        token = request_deadline.set(started + self.deadline)
+        dropped = False
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # ошибка приложения — не признак перегрузки, лимит из-за неё не падает
+            dropped = is_overload_error(exc)
+            if response_started or not is_overload_error(exc):
+                raise
+            await self.reject(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+            limiter.release(time.monotonic() - started, dropped)
+
+    async def reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            {"detail": "service_overloaded"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+        await response(scope, receive, send)
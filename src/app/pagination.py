@@ -0,0 +1,24 @@
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(created_at: datetime, q_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{q_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, q_id = raw.split("|")
+        after = datetime.fromisoformat(created_at), int(q_id)
+        # время в БД хранится без часового пояса, сравнивать с aware нельзя
+        if after[0].tzinfo is not None:
+            raise ValueError("cursor with timezone")
+        return after
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_cursor"
+        )
@@ -0,0 +1,295 @@
+import asyncio
+import os
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from types import FrameType
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_PREFIX = "/admin/"
+MAX_CAPTURE_SECONDS = 120
+
+# один захват на воркер: два профилировщика мешали бы друг другу
+capture_lock = asyncio.Lock()
+
+SYS_PATHS = sorted((p for p in sys.path if p), key=len, reverse=True)
+
+
+def require_admin(
+    x_admin_token: Annotated[Optional[str], Header()] = None,
+) -> None:
+    # без ADMIN_TOKEN профилирование выключено и маршрутов как будто нет
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    # compare_digest не принимает str с не-ASCII символами, а заголовки
+    # Starlette декодирует как latin-1
+    if x_admin_token is None or not secrets.compare_digest(
+        x_admin_token.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="forbidden")
+
+
+def short_path(filename: str) -> str:
+    for prefix in SYS_PATHS:
+        if filename.startswith(prefix):
+            return filename[len(prefix) :].lstrip(os.sep)
+
+    return filename
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{short_path(code.co_filename)}:{code.co_qualname}"
+
+
+def collapse(frame: Optional[FrameType]) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+
+    return stack[::-1]
+
+
+def to_collapsed(stacks: Counter) -> str:
+    # формат "кадр;кадр;кадр вес" понимают flamegraph.pl, speedscope и inferno
+    return "".join(f"{stack} {weight}\n" for stack, weight in stacks.most_common())
+
+
+class SamplingProfiler:
+    # раз в interval снимает стеки всех потоков, кроме своего.
+    # Синхронная часть SQLAlchemy выполняется в greenlet, её стек начинается
+    # с greenlet_spawn, а не с эндпоинта
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = [names.get(thread_id, str(thread_id)), *collapse(frame)]
+                self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+
+class RouteAllocations:
+    # память, выделенная за время запроса, по маршрутам. tracemalloc считает
+    # память всего процесса, поэтому средние берутся только по запросам,
+    # которые выполнялись в одиночку
+    def __init__(self):
+        self.active = False
+        self.capture = 0
+        self.in_flight = 0
+        self.started = 0
+        self.stats: defaultdict[str, Counter] = defaultdict(Counter)
+
+    def reset(self) -> None:
+        # запросы, начатые во время прошлого захвата, в новый не попадут
+        self.capture += 1
+        self.in_flight = 0
+        self.started = 0
+        self.stats.clear()
+
+    def begin(self) -> tuple:
+        alone = self.in_flight == 0
+        if alone:
+            tracemalloc.reset_peak()
+
+        self.in_flight += 1
+        self.started += 1
+        return (
+            self.capture,
+            self.started,
+            alone,
+            sys.getallocatedblocks(),
+            tracemalloc.get_traced_memory()[0],
+        )
+
+    def end(self, route: str, token: tuple) -> None:
+        capture, seq, alone, blocks, size = token
+        if capture != self.capture or not self.active:
+            return
+
+        self.in_flight -= 1
+        stats = self.stats[route]
+        stats["requests"] += 1
+        if alone and self.started == seq:
+            current, peak = tracemalloc.get_traced_memory()
+            stats["solo"] += 1
+            stats["blocks"] += sys.getallocatedblocks() - blocks
+            stats["bytes"] += current - size
+            stats["peak_bytes"] += peak - size
+
+    def report(self) -> dict[str, dict]:
+        report = {}
+        for route, stats in sorted(self.stats.items()):
+            solo = stats["solo"]
+            report[route] = {
+                "requests": stats["requests"],
+                "solo_requests": solo,
+                "blocks_per_request": stats["blocks"] / solo if solo else None,
+                "bytes_per_request": stats["bytes"] / solo if solo else None,
+                "peak_bytes_per_request": stats["peak_bytes"] / solo if solo else None,
+            }
+
+        return report
+
+
+route_allocations = RouteAllocations()
+
+
+class AllocationMiddleware:
+    def __init__(self, app: ASGIApp, allocations: RouteAllocations = route_allocations):
+        self.app = app
+        self.allocations = allocations
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            not self.allocations.active
+            or scope["type"] != "http"
+            or scope["path"].startswith(ADMIN_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        token = self.allocations.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # маршрут выставляет роутер FastAPI, когда находит подходящий
+            route = scope.get("route")
+            path = route.path if route is not None else "<unmatched>"
+            self.allocations.end(f"{scope['method']} {path}", token)
+
+
+async def traced(
+    seconds: float, frames: int
+) -> tuple[tracemalloc.Snapshot, tracemalloc.Snapshot]:
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+
+    try:
+        before = await asyncio.to_thread(tracemalloc.take_snapshot)
+        await asyncio.sleep(seconds)
+        after = await asyncio.to_thread(tracemalloc.take_snapshot)
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    return before, after
+
+
+def memory_growth(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> Counter:
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    stacks: Counter = Counter()
+    for stat in after.filter_traces(ignore).compare_to(
+        before.filter_traces(ignore), "traceback"
+    ):
+        if stat.size_diff > 0:
+            stack = ";".join(
+                f"{short_path(frame.filename)}:{frame.lineno}"
+                for frame in stat.traceback
+            )
+            stacks[stack] += stat.size_diff
+
+    return stacks
+
+
+router = APIRouter(prefix="/admin/profile", dependencies=[Depends(require_admin)])
+
+CaptureSeconds = Annotated[float, Query(gt=0, le=MAX_CAPTURE_SECONDS)]
+
+
+def ensure_idle() -> None:
+    if capture_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="capture_in_progress"
+        )
+
+
+@router.get("/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: CaptureSeconds = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 5,
+) -> PlainTextResponse:
+    ensure_idle()
+    async with capture_lock:
+        profiler = SamplingProfiler(interval_ms / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(profiler.stop)
+
+    return PlainTextResponse(
+        to_collapsed(profiler.stacks),
+        headers={"X-Profile-Samples": str(profiler.samples)},
+    )
+
+
+@router.get("/memory", response_class=PlainTextResponse)
+async def profile_memory(
+    seconds: CaptureSeconds = 10,
+    frames: Annotated[int, Query(ge=1, le=100)] = 25,
+) -> PlainTextResponse:
+    # вес стека — на сколько байт выросла живая память, выделенная в нём
+    ensure_idle()
+    async with capture_lock:
+        before, after = await traced(seconds, frames)
+        stacks = await asyncio.to_thread(memory_growth, before, after)
+
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+@router.get("/allocations")
+async def profile_allocations(seconds: CaptureSeconds = 10) -> dict:
+    ensure_idle()
+    async with capture_lock:
+        route_allocations.reset()
+        started = time.monotonic()
+        tracing_here = not tracemalloc.is_tracing()
+        if tracing_here:
+            tracemalloc.start(1)
+
+        route_allocations.active = True
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            route_allocations.active = False
+            if tracing_here:
+                tracemalloc.stop()
+
+    return {
+        "seconds": round(time.monotonic() - started, 3),
+        "routes": route_allocations.report(),
+    }
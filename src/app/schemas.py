@@ -1,9 +1,16 @@
 from datetime import datetime
-from typing import Annotated
-from pydantic import BaseModel, ConfigDict, StringConstraints
+from typing import Annotated, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator
 
 NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
+TagName = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True, to_lower=True, min_length=1, max_length=50
+    ),
+]
+
 
 class AnswerResponse(BaseModel):
     id: int
@@ -11,6 +18,7 @@ class AnswerResponse(BaseModel):
     user_id: str
     text: str
     created_at: datetime
+    score: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -22,17 +30,59 @@ class CreateAnswerParams(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class VoteParams(BaseModel):
+    user_id: NonEmptyStr
+    value: Literal[1, -1] = 1
+
+
+class VoteResponse(BaseModel):
+    answer_id: int
+    user_id: str
+    value: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class QuestionCreateParams(BaseModel):
     text: NonEmptyStr
+    tags: list[TagName] = Field(default_factory=list, max_length=10)
+
+    @field_validator("tags")
+    @classmethod
+    def unique_tags(cls, tags: list[str]) -> list[str]:
+        return list(dict.fromkeys(tags))
 
 
 class QuestionResponse(BaseModel):
     id: int
     text: str
     created_at: datetime
+    tags: list[str] = []
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("tags", mode="before")
+    @classmethod
+    def tag_names(cls, tags: list) -> list[str]:
+        return [getattr(tag, "name", tag) for tag in tags]
+
 
 class QuestionWithAnswersResponse(QuestionResponse):
     answers: list[AnswerResponse]
+
+
+class TagCountResponse(BaseModel):
+    name: str
+    count: int
+
+
+class AnswerPreviewResponse(BaseModel):
+    id: int
+    user_id: str
+    text: str
+    created_at: datetime
+
+
+class FeedItemResponse(QuestionResponse):
+    answers_count: int
+    latest_answer: Optional[AnswerPreviewResponse]
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Optional
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.db.db_config import engine_options
+from src.db.models import Answer, Question, Tag, question_tags
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "как почему где можно нужно ли работает ошибка при запуске в python sql "
+    "запрос индекс таблица сервер ответ данные список функция класс метод "
+    "версия настройка docker postgres fastapi тест быстро медленно память "
+    "кэш страница поиск пользователь файл строка число время дата и не на с"
+).split()
+
+QUESTION_COLUMNS = ("id", "text", "created_at")
+ANSWER_COLUMNS = ("id", "question_id", "user_id", "text", "created_at", "score")
+QUESTION_TAG_COLUMNS = ("question_id", "tag_id")
+
+
+def zipf_cum_weights(n: int, s: float) -> list[float]:
+    # P(k) ~ 1 / (k + 1) ** s для k = 0..n-1
+    return list(accumulate(1 / (k + 1) ** s for k in range(n)))
+
+
+def make_corpus(rng: random.Random, size: int = 1 << 20) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+
+    return " ".join(words)
+
+
+class TextSource:
+    # длины текстов распределены логнормально, сам текст — срез общего корпуса
+    def __init__(self, rng: random.Random, corpus: str):
+        self.rng = rng
+        self.corpus = corpus
+
+    def make(self, median: int, sigma: float, limit: int) -> str:
+        length = int(self.rng.lognormvariate(math.log(median), sigma))
+        length = max(1, min(length, limit))
+        start = self.rng.randrange(len(self.corpus) - length)
+        return self.corpus[start : start + length].strip() or "?"
+
+
+async def copy_rows(
+    session: AsyncSession, table: Table, columns: tuple[str, ...], rows: list[tuple]
+) -> None:
+    if not rows:
+        return
+
+    conn = await session.connection()
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=rows, columns=columns
+        )
+    else:
+        await conn.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+async def ensure_tags(session: AsyncSession, count: int) -> list[int]:
+    names = [f"tag{i}" for i in range(count)]
+    existing = set(
+        (await session.execute(select(Tag.name).where(Tag.name.in_(names)))).scalars()
+    )
+    session.add_all(Tag(name=name) for name in names if name not in existing)
+    await session.flush()
+
+    rows = await session.execute(select(Tag.id, Tag.name).where(Tag.name.in_(names)))
+    by_name = {name: tag_id for tag_id, name in rows}
+    # порядок важен: первые теги самые популярные
+    return [by_name[name] for name in names]
+
+
+async def next_id(session: AsyncSession, column) -> int:
+    return ((await session.execute(select(func.max(column)))).scalar() or 0) + 1
+
+
+async def generate(
+    session: AsyncSession,
+    questions: int,
+    max_answers: int = 200,
+    zipf: float = 2.0,
+    days: int = 365,
+    tags: int = 50,
+    users: int = 10000,
+    batch_size: int = 5000,
+    seed: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> tuple[int, int]:
+    rng = random.Random(seed)
+    texts = TextSource(rng, make_corpus(rng))
+    now = now or datetime.now()
+    span = days * 86400
+
+    answers_weights = zipf_cum_weights(max_answers + 1, zipf)
+    users_weights = zipf_cum_weights(users, 1.1)
+    tag_ids = await ensure_tags(session, tags) if tags else []
+    tags_weights = zipf_cum_weights(len(tag_ids), 1.0) if tag_ids else None
+
+    # id выдаём сами, чтобы ответы и связи с тегами можно было грузить
+    # тем же COPY, не дожидаясь RETURNING от вопросов
+    q_id = await next_id(session, Question.id)
+    a_id = await next_id(session, Answer.id)
+    total_answers = 0
+
+    for start in range(0, questions, batch_size):
+        q_rows, a_rows, t_rows = [], [], []
+        count = min(batch_size, questions - start)
+        answer_counts = rng.choices(
+            range(max_answers + 1), cum_weights=answers_weights, k=count
+        )
+
+        for i, answers in enumerate(answer_counts, start):
+            # активность растёт со временем: свежих вопросов больше, чем старых;
+            # как и в живой базе, время создания растёт вместе с id
+            age = span * (1 - math.sqrt((i + rng.random()) / questions))
+            created_at = now - timedelta(seconds=age)
+            q_rows.append((q_id, texts.make(80, 0.6, 2000), created_at))
+
+            for user in rng.choices(range(users), cum_weights=users_weights, k=answers):
+                delay = min(rng.expovariate(1 / 21600), age)
+                a_rows.append(
+                    (
+                        a_id,
+                        q_id,
+                        f"user{user}",
+                        texts.make(300, 0.9, 5000),
+                        created_at + timedelta(seconds=delay),
+                        0,
+                    )
+                )
+                a_id += 1
+
+            if tag_ids:
+                picked = rng.choices(
+                    tag_ids, cum_weights=tags_weights, k=rng.randint(0, 3)
+                )
+                t_rows.extend((q_id, tag_id) for tag_id in set(picked))
+
+            q_id += 1
+
+        await copy_rows(session, Question.__table__, QUESTION_COLUMNS, q_rows)
+        await copy_rows(session, Answer.__table__, ANSWER_COLUMNS, a_rows)
+        await copy_rows(session, question_tags, QUESTION_TAG_COLUMNS, t_rows)
+        await session.commit()
+
+        total_answers += len(a_rows)
+        logger.info("loaded %s questions, %s answers", start + count, total_answers)
+
+    conn = await session.connection()
+    if conn.dialect.name == "postgresql":
+        # COPY с явными id не двигает последовательности
+        for table in ("questions", "answers"):
+            await session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+        await session.commit()
+
+    return questions, total_answers
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = os.getenv("DATABASE_URL")
+    engine = create_async_engine(url, **{**engine_options(url), "echo": False})
+
+    started = time.perf_counter()
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+        questions, answers = await generate(
+            session,
+            questions=args.questions,
+            max_answers=args.max_answers,
+            zipf=args.zipf,
+            days=args.days,
+            tags=args.tags,
+            users=args.users,
+            batch_size=args.batch_size,
+            seed=args.seed,
+        )
+
+    if engine.dialect.name == "postgresql":
+        # свежие статистики, иначе планировщик считает таблицы пустыми
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE questions, answers, question_tags"))
+
+    await engine.dispose()
+    elapsed = time.perf_counter() - started
+    print(f"loaded {questions} questions and {answers} answers in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="наполнить БД синтетическими вопросами и ответами"
+    )
+    parser.add_argument("--questions", type=int, default=100000)
+    parser.add_argument(
+        "--max-answers", type=int, default=200, help="максимум ответов на вопрос"
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=2.0,
+        help="показатель закона Ципфа для числа ответов: чем больше, тем чаще вопросы без ответов",
+    )
+    parser.add_argument("--days", type=int, default=365, help="глубина истории")
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args))
@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import defaultdict
+from typing import Any, NamedTuple, Optional
+
+import httpx
+
+# доли маршрутов внутри чтений и внутри записей
+READ_MIX = {
+    "GET /feed/": 30,
+    "GET /questions/": 20,
+    "GET /questions/{id}": 35,
+    "GET /answers/{id}": 10,
+    "GET /tags/": 5,
+}
+WRITE_MIX = {
+    "POST /questions/": 20,
+    "POST /questions/{id}/answers/": 50,
+    "POST /answers/{id}/vote": 30,
+}
+
+ID_RE = re.compile(r"/\d+")
+
+
+class Result(NamedTuple):
+    route: str
+    status: Optional[int]
+    latency: float
+    # насколько позже расписания ушёл запрос: если растёт, узкое место в клиенте
+    lag: float
+
+
+def route_of(method: str, path: str) -> str:
+    return f"{method} {ID_RE.sub('/{id}', path.partition('?')[0])}"
+
+
+def recent_id(rng: random.Random, max_id: int) -> int:
+    # свежие вопросы и ответы запрашивают чаще старых
+    return max(1, max_id - int(rng.paretovariate(1.2)) + 1)
+
+
+def make_request(
+    rng: random.Random, route: str, max_question_id: int, max_answer_id: int
+) -> dict[str, Any]:
+    q_id = recent_id(rng, max_question_id)
+    a_id = recent_id(rng, max_answer_id)
+    user_id = f"user{rng.randrange(100000)}"
+
+    requests = {
+        "GET /feed/": ("GET", f"/feed/?page={min(int(rng.expovariate(1)), 4)}", None),
+        "GET /questions/": ("GET", "/questions/?limit=20", None),
+        "GET /questions/{id}": ("GET", f"/questions/{q_id}", None),
+        "GET /answers/{id}": ("GET", f"/answers/{a_id}", None),
+        "GET /tags/": ("GET", "/tags/", None),
+        "POST /questions/": ("POST", "/questions/", {"text": "replay question"}),
+        "POST /questions/{id}/answers/": (
+            "POST",
+            f"/questions/{q_id}/answers/",
+            {"user_id": user_id, "text": "replay answer"},
+        ),
+        "POST /answers/{id}/vote": (
+            "POST",
+            f"/answers/{a_id}/vote",
+            {"user_id": user_id, "value": rng.choice((1, 1, 1, -1))},
+        ),
+    }
+    method, path, body = requests[route]
+
+    return {"method": method, "path": path, "json": body}
+
+
+def synthetic_trace(
+    duration: float,
+    rate: float,
+    write_ratio: float,
+    max_question_id: int,
+    max_answer_id: int,
+    seed: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    # открытая модель нагрузки: пуассоновский поток, интервалы экспоненциальные
+    rng = random.Random(seed)
+    trace = []
+    t = rng.expovariate(rate)
+
+    while t < duration:
+        mix = WRITE_MIX if rng.random() < write_ratio else READ_MIX
+        route = rng.choices(list(mix), weights=list(mix.values()))[0]
+        request = make_request(rng, route, max_question_id, max_answer_id)
+        trace.append({"t": round(t, 6), **request})
+        t += rng.expovariate(rate)
+
+    return trace
+
+
+def load_trace(path: str) -> list[dict[str, Any]]:
+    with open(path) as f:
+        return sorted(
+            (json.loads(line) for line in f if line.strip()), key=lambda e: e["t"]
+        )
+
+
+def save_trace(path: str, trace: list[dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        for entry in trace:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+async def replay(
+    client: httpx.AsyncClient, trace: list[dict[str, Any]], speed: float = 1.0
+) -> list[Result]:
+    # запросы уходят по расписанию трассы, не дожидаясь ответов на предыдущие
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    results = []
+
+    async def fire(entry: dict[str, Any]) -> None:
+        scheduled = started + entry["t"] / speed
+        await asyncio.sleep(max(0.0, scheduled - loop.time()))
+
+        lag = loop.time() - scheduled
+        began = time.perf_counter()
+        try:
+            response = await client.request(
+                entry["method"], entry["path"], json=entry.get("json")
+            )
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+
+        results.append(
+            Result(
+                route_of(entry["method"], entry["path"]),
+                status,
+                time.perf_counter() - began,
+                lag,
+            )
+        )
+
+    await asyncio.gather(*(fire(entry) for entry in trace))
+
+    return results
+
+
+def percentile(values: list[float], q: float) -> float:
+    # nearest-rank
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: list[Result]) -> dict[str, dict[str, float]]:
+    if not results:
+        return {}
+
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result.route].append(result)
+    by_route["total"] = results
+
+    summary = {}
+    for route, items in sorted(by_route.items()):
+        latencies = [r.latency * 1000 for r in items]
+        summary[route] = {
+            "count": len(items),
+            # 404/409 на случайных id — ожидаемая часть нагрузки, не ошибка
+            "errors": sum(r.status is None or r.status >= 500 for r in items),
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        }
+
+    return summary
+
+
+def print_summary(summary: dict[str, dict[str, float]], lag: float) -> None:
+    print(
+        f"{'route':<34}{'count':>8}{'errors':>8}"
+        f"{'p50, ms':>10}{'p90, ms':>10}{'p99, ms':>10}{'max, ms':>10}"
+    )
+    for route, row in summary.items():
+        print(
+            f"{route:<34}{row['count']:>8}{row['errors']:>8}"
+            f"{row['p50']:>10.1f}{row['p90']:>10.1f}{row['p99']:>10.1f}"
+            f"{row['max']:>10.1f}"
+        )
+    print(f"max schedule lag: {lag * 1000:.1f} ms")
+
+
+async def probe_max_ids(client: httpx.AsyncClient) -> tuple[int, int]:
+    # самые свежие id берём из ленты: там новые вопросы и их последние ответы
+    items = (await client.get("/feed/")).json()
+    max_question_id = max((item["id"] for item in items), default=1)
+    max_answer_id = max(
+        (item["latest_answer"]["id"] for item in items if item["latest_answer"]),
+        default=1,
+    )
+
+    return max_question_id, max_answer_id
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.connections)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=args.timeout
+    ) as client:
+        if args.trace:
+            trace = load_trace(args.trace)
+        else:
+            max_question_id, max_answer_id = await probe_max_ids(client)
+            trace = synthetic_trace(
+                args.duration,
+                args.rate,
+                args.write_ratio,
+                max_question_id,
+                max_answer_id,
+                args.seed,
+            )
+            if args.save_trace:
+                save_trace(args.save_trace, trace)
+
+        if not trace:
+            print("no requests")
+            return
+
+        started = time.perf_counter()
+        results = await replay(client, trace, args.speed)
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed:.1f} rps)"
+    )
+    print_summary(summarize(results), max(r.lag for r in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="воспроизвести нагрузку на сервис по трассе и посчитать перцентили задержек"
+    )
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--trace", help="JSONL-трасса: {t, method, path, json}; без неё — синтетика"
+    )
+    parser.add_argument("--save-trace", help="сохранить сгенерированную трассу")
+    parser.add_argument("--duration", type=float, default=60, help="секунды")
+    parser.add_argument("--rate", type=float, default=50, help="запросов в секунду")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="ускорение воспроизведения трассы"
+    )
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from src.db.db_repository import (
+    ANSWER_BY_ID_STMT,
+    QUESTION_BY_ID_STMT,
+    QUESTION_WITH_ANSWERS_STMT,
+)
+from src.db.models import Answer, Base, Question
+
+
+CASES = {
+    "get_question_by_id": (
+        lambda q_id: (select(Question).where(Question.id == q_id), None),
+        lambda q_id: (QUESTION_BY_ID_STMT, {"q_id": q_id}),
+    ),
+    "get_questions_with_answers": (
+        lambda q_id: (
+            select(Question)
+            .options(selectinload(Question.answers), selectinload(Question.tags))
+            .where(Question.id == q_id),
+            None,
+        ),
+        lambda q_id: (QUESTION_WITH_ANSWERS_STMT, {"q_id": q_id}),
+    ),
+    "get_answer_by_id": (
+        lambda a_id: (select(Answer).where(Answer.id == a_id), None),
+        lambda a_id: (ANSWER_BY_ID_STMT, {"a_id": a_id}),
+    ),
+}
+
+
+def bench_build(make_stmt, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        stmt, _ = make_stmt(i)
+        stmt._generate_cache_key()
+
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def bench_execute(session, make_stmt, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        stmt, params = make_stmt(i % 100 + 1)
+        (await session.execute(stmt, params)).unique().scalar_one_or_none()
+
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    sess = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sess() as session:
+        session.add_all(
+            Question(text=f"question {i}", answers=[Answer(user_id="u", text="a")])
+            for i in range(100)
+        )
+        await session.commit()
+
+        print(f"{'statement':<28}{'mode':<10}{'build, us':>12}{'execute, us':>14}")
+        for name, modes in CASES.items():
+            for mode, make_stmt in zip(("per-call", "prebuilt"), modes):
+                build = bench_build(make_stmt, iterations)
+                execute = await bench_execute(session, make_stmt, iterations)
+                session.expunge_all()
+                print(f"{name:<28}{mode:<10}{build:>12.1f}{execute:>14.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="накладные расходы на вызов: запрос на каждый вызов vs собранный заранее"
+    )
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.db.db_config import dispose_engine, make_session_maker
+from src.db.models import Answer, ArchivedQuestion, Question, Tag
+from src.db.votes import score_buffer
+
+logger = logging.getLogger(__name__)
+
+# вопросы пачки блокируются до конца транзакции: ответ на такой вопрос
+# не вставится (проверка внешнего ключа ждёт FOR KEY SHARE), а строки,
+# которые уже забрал параллельный запуск, пропускаются
+OLD_QUESTION_IDS_STMT = (
+    select(Question.id).order_by(Question.id).with_for_update(skip_locked=True)
+)
+
+# блокировка ответов не даёт проголосовать за них, пока пачка не перенесена
+LOCK_ANSWERS_STMT = (
+    select(Answer.id)
+    .where(Answer.question_id.in_(bindparam("ids", expanding=True)))
+    .with_for_update()
+)
+
+# populate_existing: в архив идут значения, прочитанные под блокировкой,
+# а не объекты, уже загруженные в сессию
+QUESTIONS_TO_PACK_STMT = (
+    select(Question)
+    .options(selectinload(Question.answers), selectinload(Question.tags))
+    .where(Question.id.in_(bindparam("ids", expanding=True)))
+    .order_by(Question.id)
+    .execution_options(populate_existing=True)
+)
+
+
+def pack_question(question: Question) -> bytes:
+    data = {
+        "id": question.id,
+        "text": question.text,
+        "created_at": question.created_at.isoformat(),
+        "tags": [tag.name for tag in question.tags],
+        "answers": [
+            {
+                "id": answer.id,
+                "user_id": answer.user_id,
+                "text": answer.text,
+                "created_at": answer.created_at.isoformat(),
+                "score": answer.score,
+            }
+            for answer in question.answers
+        ],
+    }
+
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 9)
+
+
+def unpack_question(payload: bytes) -> dict[str, Any]:
+    return json.loads(zlib.decompress(payload))
+
+
+def question_from_archive(data: dict[str, Any]) -> Question:
+    # объект не привязан к сессии и нужен только для сериализации ответа
+    return Question(
+        id=data["id"],
+        text=data["text"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+        tags=[Tag(name=name) for name in data["tags"]],
+        answers=[
+            Answer(
+                id=answer["id"],
+                question_id=data["id"],
+                user_id=answer["user_id"],
+                text=answer["text"],
+                created_at=datetime.fromisoformat(answer["created_at"]),
+                score=answer["score"],
+            )
+            for answer in data["answers"]
+        ],
+    )
+
+
+async def archive_questions(
+    session: AsyncSession, older_than: datetime, batch_size: int = 500
+) -> int:
+    total = 0
+
+    while True:
+        # голоса, накопленные в этом процессе, должны попасть в score до упаковки.
+        # Буферы воркеров приложения отсюда не видны: их дельты для перенесённых
+        # ответов (не больше чем за VOTE_FLUSH_INTERVAL_SECONDS) теряются
+        await score_buffer.flush(session)
+
+        ids = (
+            (
+                await session.execute(
+                    OLD_QUESTION_IDS_STMT.where(Question.created_at < older_than).limit(
+                        batch_size
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+
+        await session.execute(LOCK_ANSWERS_STMT, {"ids": ids})
+        questions = (
+            (await session.execute(QUESTIONS_TO_PACK_STMT, {"ids": ids}))
+            .scalars()
+            .all()
+        )
+
+        # копия в архив и удаление из горячих таблиц в одной транзакции;
+        # ответы, голоса и связи с тегами удаляются каскадом
+        await session.execute(
+            insert(ArchivedQuestion),
+            [
+                {"id": q.id, "created_at": q.created_at, "payload": pack_question(q)}
+                for q in questions
+            ],
+        )
+        await session.execute(delete(Question).where(Question.id.in_(ids)))
+        await session.commit()
+        session.expunge_all()
+
+        total += len(ids)
+        logger.info("archived %s questions, %s total", len(ids), total)
+
+    return total
+
+
+async def main(older_than_days: int, batch_size: int) -> None:
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+
+    async with make_session_maker()() as session:
+        total = await archive_questions(session, cutoff, batch_size)
+
+    await dispose_engine()
+    print(f"archived {total} questions created before {cutoff:%Y-%m-%d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="перенести старые вопросы с ответами в archived_questions"
+    )
+    parser.add_argument("--older-than-days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.older_than_days, args.batch_size))
@@ -0,0 +1,64 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+
+class CachedValue(Generic[T]):
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Optional[T] = None
+        self._expires_at = 0.0
+
+    def get(self) -> Optional[T]:
+        if time.monotonic() >= self._expires_at:
+            return None
+
+        return self._value
+
+    def set(self, value: T) -> None:
+        self._value = value
+        self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self) -> None:
+        self._value = None
+        self._expires_at = 0.0
+
+
+class LRUCache(Generic[K, T]):
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict[K, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[T]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: T) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else math.inf
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
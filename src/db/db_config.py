@@ -1,13 +1,107 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, QueuePool
+from contextvars import ContextVar
+from typing import Optional
+from uuid import uuid4
+import asyncio
 import os
+import time
 
 
-async def make_engine():
-    return create_async_engine(os.getenv("DATABASE_URL"), echo=True)
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE_MS", "5000")) / 1000
+
+_engine: Optional[AsyncEngine] = None
+_session_maker: Optional[async_sessionmaker] = None
+
+# момент (time.monotonic()), к которому запрос должен быть обработан
+request_deadline: ContextVar[Optional[float]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+@event.listens_for(Session, "after_begin")
+def apply_statement_timeout(session, transaction, connection) -> None:
+    deadline = request_deadline.get()
+    if deadline is None or connection.dialect.name != "postgresql":
+        return
+
+    remaining_ms = int((deadline - time.monotonic()) * 1000)
+    if remaining_ms <= 0:
+        raise DeadlineExceeded()
+
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+
+
+def engine_options(url: str) -> dict:
+    options: dict = {"echo": True}
+
+    if url.startswith("postgresql") and os.getenv("DB_PGBOUNCER") != "1":
+        # ждать соединение из пула дольше бюджета запроса бессмысленно:
+        # такой запрос всё равно получит 503
+        options["pool_timeout"] = REQUEST_DEADLINE
+
+    if os.getenv("DB_PGBOUNCER") == "1" and url.startswith("postgresql+asyncpg"):
+        # в режиме transaction pooling соединение с сервером меняется между
+        # транзакциями, поэтому кэш prepared statements asyncpg отключаем,
+        # а имена делаем уникальными, чтобы не пересекаться с чужими сессиями
+        options["poolclass"] = NullPool
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return options
+
+
+def make_engine() -> AsyncEngine:
+    global _engine
+
+    if _engine is None:
+        url = os.getenv("DATABASE_URL")
+        _engine = create_async_engine(url, **engine_options(url))
+
+    return _engine
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_maker
+
+    if _engine is not None:
+        await _engine.dispose()
+
+    _engine = None
+    _session_maker = None
+
+
+async def prewarm_pool(connections: int) -> None:
+    # соединения открываются параллельно и возвращаются в пул; в режиме
+    # PgBouncer (NullPool) держать их негде
+    engine = make_engine()
+    if not isinstance(engine.pool, QueuePool):
+        return
+
+    count = min(connections, engine.pool.size())
+    conns = await asyncio.gather(*(engine.connect().start() for _ in range(count)))
+    for conn in conns:
+        await conn.close()
+
+
+def make_session_maker() -> async_sessionmaker:
+    global _session_maker
+
+    if _session_maker is None:
+        _session_maker = async_sessionmaker(bind=make_engine(), expire_on_commit=False)
+
+    return _session_maker
 
 
 async def make_session():
-    engine = await make_engine()
-    sess = async_sessionmaker(bind=engine, expire_on_commit=False)
-    async with sess() as session:
+    async with make_session_maker()() as session:
         yield session
@@ -1,58 +1,259 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 from sqlalchemy.orm import selectinload
-from src.db.db_config import make_session
-from src.db.models import Question, Answer
-from sqlalchemy import select, delete
-from typing import Sequence, Optional
+from src.db.archive import question_from_archive, unpack_question
+from src.db.cache import CachedValue, LRUCache
+from src.db.db_config import make_session, make_session_maker, prewarm_pool
+from src.db.feed import feed_snapshot
+from src.db.models import (
+    Question,
+    Answer,
+    AnswerVote,
+    ArchivedQuestion,
+    Tag,
+    question_tags,
+)
+from src.db.votes import score_buffer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, delete, bindparam, func, tuple_
+from datetime import datetime
+from typing import Any, Callable, Sequence, Optional
+import os
+
+
+# SQLSTATE нарушений ограничений; sqlite3 вместо SQLSTATE отдаёт имя кода ошибки
+UNIQUE_VIOLATION = ("23505", "SQLITE_CONSTRAINT_UNIQUE")
+FOREIGN_KEY_VIOLATION = ("23503", "SQLITE_CONSTRAINT_FOREIGNKEY")
+
+
+class AnswerNotFound(Exception):
+    pass
+
+
+def violation_code(exc: IntegrityError) -> Optional[str]:
+    orig = exc.orig
+    return getattr(orig, "sqlstate", None) or getattr(orig, "sqlite_errorname", None)
+
+
+# запросы горячих путей собираются один раз: ключ кэша компиляции у готовой
+# конструкции мемоизирован, и SQLAlchemy не пересчитывает его на каждый вызов
+QUESTIONS_STMT = (
+    select(Question)
+    .options(selectinload(Question.tags))
+    .order_by(Question.created_at.desc(), Question.id.desc())
+)
+
+QUESTION_BY_ID_STMT = select(Question).where(Question.id == bindparam("q_id"))
+
+QUESTION_WITH_ANSWERS_STMT = (
+    select(Question)
+    .options(selectinload(Question.answers), selectinload(Question.tags))
+    .where(Question.id == bindparam("q_id"))
+)
+
+DELETE_QUESTION_STMT = (
+    delete(Question).where(Question.id == bindparam("q_id")).returning(Question.id)
+)
+
+ANSWER_BY_ID_STMT = select(Answer).where(Answer.id == bindparam("a_id"))
+
+DELETE_ANSWER_STMT = (
+    delete(Answer)
+    .where(Answer.id == bindparam("a_id"))
+    .returning(Answer.id, Answer.question_id)
+)
+
+ARCHIVED_QUESTION_STMT = select(ArchivedQuestion.payload).where(
+    ArchivedQuestion.id == bindparam("q_id")
+)
+
+DELETE_ARCHIVED_QUESTION_STMT = (
+    delete(ArchivedQuestion)
+    .where(ArchivedQuestion.id == bindparam("q_id"))
+    .returning(ArchivedQuestion.id)
+)
+
+TAGS_BY_NAMES_STMT = select(Tag).where(Tag.name.in_(bindparam("names", expanding=True)))
+
+TAG_COUNTS_STMT = (
+    select(Tag.name, func.count(question_tags.c.question_id).label("count"))
+    .join(question_tags, question_tags.c.tag_id == Tag.id)
+    .group_by(Tag.id, Tag.name)
+    .order_by(func.count(question_tags.c.question_id).desc(), Tag.name)
+)
+
+# счётчики по тегам меняются только при создании/удалении вопросов;
+# кэш локален для воркера, поэтому устаревание чужих изменений ограничено TTL
+tag_counts_cache: CachedValue[list[tuple[str, int]]] = CachedValue(
+    ttl=float(os.getenv("TAG_COUNTS_TTL_SECONDS", "30"))
+)
+
+# архивные вопросы не меняются, но их можно удалить через другой воркер:
+# как и для счётчиков тегов, устаревание ограничено TTL
+archive_cache: LRUCache[int, dict] = LRUCache(
+    maxsize=int(os.getenv("ARCHIVE_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("ARCHIVE_CACHE_TTL_SECONDS", "30")),
+)
 
 
 class QuestionsRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_questions(self) -> Sequence[Question]:
-        db_questions = await self.session.execute(
-            select(Question).order_by(Question.created_at.desc())
-        )
+    async def get_questions(
+        self,
+        tags: Sequence[str] = (),
+        match_all: bool = True,
+        limit: Optional[int] = None,
+        after: Optional[tuple[datetime, int]] = None,
+    ) -> Sequence[Question]:
+        stmt = QUESTIONS_STMT
+
+        if tags:
+            tagged = (
+                select(question_tags.c.question_id)
+                .join(Tag, Tag.id == question_tags.c.tag_id)
+                .where(Tag.name.in_(tags))
+            )
+            if match_all:
+                tagged = tagged.group_by(question_tags.c.question_id).having(
+                    func.count() == len(set(tags))
+                )
+            stmt = stmt.where(Question.id.in_(tagged))
+
+        if after is not None:
+            stmt = stmt.where(tuple_(Question.created_at, Question.id) < tuple_(*after))
+
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        db_questions = await self.session.execute(stmt)
 
         return db_questions.scalars().all()
 
+    async def get_feed_page(self, page: int) -> list[dict]:
+        await feed_snapshot.refresh(self.session)
+
+        return feed_snapshot.page(page)
+
+    async def get_feed_page_body(
+        self, page: int, render: Callable[[list[dict]], Any]
+    ) -> Any:
+        await feed_snapshot.refresh(self.session)
+
+        return feed_snapshot.page_body(page, render)
+
+    async def get_feed_window(
+        self, after: Optional[tuple[datetime, int]], limit: int
+    ) -> Optional[list[dict]]:
+        await feed_snapshot.refresh(self.session)
+
+        return feed_snapshot.window(after, limit)
+
+    async def get_tags(self, names: Sequence[str]) -> list[Tag]:
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+
+        db_tags = await self.session.execute(TAGS_BY_NAMES_STMT, {"names": names})
+        tags = {tag.name: tag for tag in db_tags.scalars().all()}
+
+        # тот же новый тег может одновременно создавать другой запрос:
+        # каждый вставляем в своей точке сохранения и при конфликте перечитываем
+        taken = []
+        for name in names:
+            if name in tags:
+                continue
+            tag = Tag(name=name)
+            try:
+                async with self.session.begin_nested():
+                    self.session.add(tag)
+                tags[name] = tag
+            except IntegrityError:
+                taken.append(name)
+
+        if taken:
+            db_tags = await self.session.execute(TAGS_BY_NAMES_STMT, {"names": taken})
+            tags.update((tag.name, tag) for tag in db_tags.scalars().all())
+
+        return [tags[name] for name in names]
+
+    async def get_tag_counts(self) -> list[tuple[str, int]]:
+        counts = tag_counts_cache.get()
+
+        if counts is None:
+            db_counts = await self.session.execute(TAG_COUNTS_STMT)
+            counts = [(name, count) for name, count in db_counts.all()]
+            tag_counts_cache.set(counts)
+
+        return counts
+
     async def get_question_by_id(self, q_id: int) -> Optional[Question]:
         db_question = await self.session.execute(
-            select(Question).where(Question.id == q_id)
+            QUESTION_BY_ID_STMT, {"q_id": q_id}
         )
 
         return db_question.scalar_one_or_none()
 
-    async def create_questions(self, text: str) -> Question:
-        new_question = Question(text=text)
+    async def create_questions(self, text: str, tags: Sequence[str] = ()) -> Question:
+        new_question = Question(text=text, tags=await self.get_tags(tags))
 
         self.session.add(new_question)
         await self.session.commit()
-        await self.session.refresh(new_question)
+        # теги уже в объекте, из БД нужно только время создания
+        await self.session.refresh(new_question, ["created_at"])
+
+        if tags:
+            tag_counts_cache.invalidate()
+        feed_snapshot.on_question_created(new_question)
 
         return new_question
 
     async def get_questions_with_answers(self, q_id: int) -> Optional[Question]:
         db_question = (
-            await self.session.execute(
-                select(Question)
-                .options(selectinload(Question.answers))
-                .where(Question.id == q_id)
-            )
+            await self.session.execute(QUESTION_WITH_ANSWERS_STMT, {"q_id": q_id})
         ).unique()
 
-        return db_question.scalar_one_or_none()
+        question = db_question.scalar_one_or_none()
+        if question is None:
+            question = await self.get_archived_question(q_id)
+
+        return question
+
+    async def get_archived_question(self, q_id: int) -> Optional[Question]:
+        data = archive_cache.get(q_id)
+
+        if data is None:
+            payload = (
+                await self.session.execute(ARCHIVED_QUESTION_STMT, {"q_id": q_id})
+            ).scalar_one_or_none()
+            if payload is None:
+                return None
+
+            data = unpack_question(payload)
+            archive_cache.set(q_id, data)
+
+        return question_from_archive(data)
 
     async def delete_question(self, q_id: int) -> Optional[int]:
         deleted_question = await self.session.execute(
-            delete(Question).where(Question.id == q_id).returning(Question.id)
+            DELETE_QUESTION_STMT, {"q_id": q_id}
         )
+        deleted_id = deleted_question.scalar_one_or_none()
+
+        if deleted_id is None:
+            deleted_archived = await self.session.execute(
+                DELETE_ARCHIVED_QUESTION_STMT, {"q_id": q_id}
+            )
+            deleted_id = deleted_archived.scalar_one_or_none()
+            archive_cache.pop(q_id)
 
         await self.session.commit()
+        tag_counts_cache.invalidate()
+        if deleted_id is not None:
+            feed_snapshot.on_question_deleted(deleted_id)
 
-        return deleted_question.scalar_one_or_none()
+        return deleted_id
 
 
 class AnswersRepository:
@@ -67,20 +268,49 @@ class AnswersRepository:
         await self.session.commit()
         await self.session.refresh(new_answer)
 
+        feed_snapshot.on_answer_created(new_answer)
+
         return new_answer
 
     async def get_answer_by_id(self, a_id: int) -> Optional[Answer]:
-        db_answer = await self.session.execute(select(Answer).where(Answer.id == a_id))
+        db_answer = await self.session.execute(ANSWER_BY_ID_STMT, {"a_id": a_id})
         return db_answer.scalar_one_or_none()
 
+    async def vote(self, a_id: int, user_id: str, value: int) -> Optional[AnswerVote]:
+        new_vote = AnswerVote(answer_id=a_id, user_id=user_id, value=value)
+
+        try:
+            async with self.session.begin_nested():
+                self.session.add(new_vote)
+        except IntegrityError as exc:
+            code = violation_code(exc)
+            if code in UNIQUE_VIOLATION:
+                return None
+            # ответ удалили между проверкой в эндпоинте и вставкой голоса
+            if code in FOREIGN_KEY_VIOLATION:
+                raise AnswerNotFound(a_id) from exc
+            raise
+
+        await self.session.commit()
+
+        score_buffer.add(a_id, value)
+
+        return new_vote
+
     async def delete_answer(self, a_id: int) -> Optional[int]:
         deleted_answer = await self.session.execute(
-            delete(Answer).where(Answer.id == a_id).returning(Answer.id)
+            DELETE_ANSWER_STMT, {"a_id": a_id}
         )
+        deleted = deleted_answer.one_or_none()
 
         await self.session.commit()
 
-        return deleted_answer.scalar_one_or_none()
+        if deleted is None:
+            return None
+
+        feed_snapshot.on_answer_deleted(deleted.question_id, deleted.id)
+
+        return deleted.id
 
 
 async def make_q_repository(
@@ -93,3 +323,20 @@ async def make_a_repository(
     session: AsyncSession = Depends(make_session),
 ) -> AnswersRepository:
     return AnswersRepository(session)
+
+
+async def warm_up(connections: int) -> None:
+    # прогоняем типовые чтения, чтобы первый запрос после старта воркера не
+    # платил за подключение к БД, компиляцию запросов и сборку ленты
+    await prewarm_pool(connections)
+
+    async with make_session_maker()() as session:
+        q_repository = QuestionsRepository(session)
+        await q_repository.get_question_by_id(0)
+        await q_repository.get_questions_with_answers(0)
+        # не get_tags: тот вставил бы отсутствующий тег
+        await session.execute(TAGS_BY_NAMES_STMT, {"names": ["warm-up"]})
+        await q_repository.get_tag_counts()
+        await q_repository.get_feed_page(0)
+        await AnswersRepository(session).get_answer_by_id(0)
+        await session.rollback()
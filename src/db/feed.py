@@ -0,0 +1,300 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.db.models import Answer, Question
+
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "20"))
+FEED_PAGES = int(os.getenv("FEED_PAGES", "5"))
+FEED_MAX_STALENESS = float(os.getenv("FEED_MAX_STALENESS_SECONDS", "30"))
+PREVIEW_LENGTH = 200
+
+FEED_QUESTIONS_STMT = (
+    select(Question)
+    .options(selectinload(Question.tags))
+    .order_by(Question.created_at.desc(), Question.id.desc())
+)
+
+
+def feed_key(item: dict) -> tuple[datetime, int]:
+    return item["created_at"], item["id"]
+
+
+def answer_preview(answer: Any) -> dict:
+    return {
+        "id": answer.id,
+        "user_id": answer.user_id,
+        "text": answer.text[:PREVIEW_LENGTH],
+        "created_at": answer.created_at,
+    }
+
+
+def question_item(question: Question, answers_count: int = 0) -> dict:
+    return {
+        "id": question.id,
+        "text": question.text,
+        "created_at": question.created_at,
+        "tags": [tag.name for tag in question.tags],
+        "answers_count": answers_count,
+        "latest_answer": None,
+    }
+
+
+class FeedSnapshot:
+    # первые FEED_PAGES страниц ленты в памяти воркера. Изменения этого воркера
+    # применяются сразу, чужие (другие воркеры, архивация) появятся не позже
+    # чем через max_staleness секунд, когда снимок пересоберётся целиком
+    def __init__(
+        self,
+        page_size: int = FEED_PAGE_SIZE,
+        pages: int = FEED_PAGES,
+        max_staleness: float = FEED_MAX_STALENESS,
+    ):
+        self.page_size = page_size
+        self.capacity = page_size * pages
+        self.max_staleness = max_staleness
+        self.items: list[dict] = []
+        self.built_at: Optional[float] = None
+        # в снимке вся таблица: вопросов меньше, чем capacity
+        self.complete = False
+        # готовые тела страниц, сбрасываются при изменении страницы
+        self._page_bodies: dict[int, Any] = {}
+        self._index: dict[int, dict] = {}
+        self._stale_ids: set[int] = set()
+        self._needs_fill = False
+        # события, пришедшие, пока снимок читается из БД (None — чтения нет)
+        self._missed: Optional[list[tuple[str, Any]]] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def age(self) -> Optional[float]:
+        if self.built_at is None:
+            return None
+
+        return time.monotonic() - self.built_at
+
+    def reset(self) -> None:
+        self.items = []
+        self.built_at = None
+        self.complete = False
+        self._page_bodies.clear()
+        self._index.clear()
+        self._stale_ids.clear()
+        self._needs_fill = False
+        self._missed = None
+
+    async def refresh(self, session: AsyncSession) -> None:
+        if self.built_at is not None and self.age < self.max_staleness:
+            if not self._stale_ids and not self._needs_fill:
+                return
+
+        async with self._lock:
+            self._missed = []
+            try:
+                if self.built_at is None or self.age >= self.max_staleness:
+                    await self.rebuild(session)
+                else:
+                    await self.repair(session)
+            finally:
+                missed, self._missed = self._missed, None
+
+            self.replay(missed)
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        items = await self.load_items(session, FEED_QUESTIONS_STMT.limit(self.capacity))
+
+        self.items = items
+        self._index = {item["id"]: item for item in items}
+        self.complete = len(items) < self.capacity
+        self.built_at = time.monotonic()
+        self._page_bodies.clear()
+        self._stale_ids.clear()
+        self._needs_fill = False
+
+    def replay(self, missed: list[tuple[str, Any]]) -> None:
+        # запрос к БД мог не увидеть запись, закоммиченную во время чтения.
+        # Вопросы повторяем (оба обработчика идемпотентны), а вопросы с новыми
+        # или удалёнными ответами перечитает следующий repair
+        for event, arg in missed:
+            if event == "question_created":
+                self.on_question_created(arg)
+            elif event == "question_deleted":
+                self.on_question_deleted(arg)
+            elif arg in self._index:
+                self._stale_ids.add(arg)
+
+    async def repair(self, session: AsyncSession) -> None:
+        stale_ids = [q_id for q_id in self._stale_ids if q_id in self._index]
+        self._stale_ids.clear()
+        if stale_ids:
+            stmt = FEED_QUESTIONS_STMT.where(Question.id.in_(stale_ids))
+            for fresh in await self.load_items(session, stmt):
+                item = self._index.get(fresh["id"])
+                if item is not None:
+                    item.update(fresh)
+                    self.invalidate_page(self.items.index(item))
+
+        if self._needs_fill:
+            self._needs_fill = False
+            missing = self.capacity - len(self.items)
+            if missing > 0 and not self.complete:
+                stmt = FEED_QUESTIONS_STMT.limit(missing)
+                if self.items:
+                    stmt = stmt.where(
+                        tuple_(Question.created_at, Question.id)
+                        < tuple_(*feed_key(self.items[-1]))
+                    )
+                tail = await self.load_items(session, stmt)
+                self.invalidate_from(len(self.items))
+                self.items.extend(tail)
+                self._index.update((item["id"], item) for item in tail)
+                self.complete = len(tail) < missing
+
+    async def load_items(self, session: AsyncSession, stmt) -> list[dict]:
+        questions = (await session.execute(stmt)).scalars().all()
+        items = [question_item(q) for q in questions]
+        if not items:
+            return items
+
+        by_id = {item["id"]: item for item in items}
+        ranked = (
+            select(
+                Answer.id,
+                Answer.question_id,
+                Answer.user_id,
+                Answer.text,
+                Answer.created_at,
+                func.count()
+                .over(partition_by=Answer.question_id)
+                .label("answers_count"),
+                func.row_number()
+                .over(
+                    partition_by=Answer.question_id,
+                    order_by=(Answer.created_at.desc(), Answer.id.desc()),
+                )
+                .label("rn"),
+            )
+            .where(Answer.question_id.in_(list(by_id)))
+            .subquery()
+        )
+        latest = await session.execute(select(ranked).where(ranked.c.rn == 1))
+
+        for row in latest:
+            item = by_id[row.question_id]
+            item["answers_count"] = row.answers_count
+            item["latest_answer"] = answer_preview(row)
+
+        return items
+
+    def page(self, page: int) -> list[dict]:
+        start = page * self.page_size
+        return self.items[start : start + self.page_size]
+
+    def page_body(self, page: int, render: Callable[[list[dict]], Any]) -> Any:
+        body = self._page_bodies.get(page)
+        if body is None:
+            body = self._page_bodies[page] = render(self.page(page))
+
+        return body
+
+    def window(
+        self, after: Optional[tuple[datetime, int]], limit: int
+    ) -> Optional[list[dict]]:
+        # None — окно не помещается в снимок, нужно идти в БД
+        if self.built_at is None or self._stale_ids or self._needs_fill:
+            return None
+
+        start = 0
+        if after is not None:
+            start = next(
+                (i for i, item in enumerate(self.items) if feed_key(item) < after),
+                len(self.items),
+            )
+
+        if start + limit > len(self.items) and not self.complete:
+            return None
+
+        return self.items[start : start + limit]
+
+    def invalidate_page(self, index: int) -> None:
+        self._page_bodies.pop(index // self.page_size, None)
+
+    def invalidate_from(self, index: int) -> None:
+        first_page = index // self.page_size
+        for page in [p for p in self._page_bodies if p >= first_page]:
+            del self._page_bodies[page]
+
+    def record(self, event: str, arg: Any) -> None:
+        if self._missed is not None:
+            self._missed.append((event, arg))
+
+    def on_question_created(self, question: Question) -> None:
+        self.record("question_created", question)
+        if self.built_at is None or question.id in self._index:
+            return
+
+        item = question_item(question)
+        index = next(
+            (
+                i
+                for i, other in enumerate(self.items)
+                if feed_key(other) < feed_key(item)
+            ),
+            len(self.items),
+        )
+        if index >= self.capacity or (index == len(self.items) and not self.complete):
+            return
+
+        self.items.insert(index, item)
+        self._index[item["id"]] = item
+        self.invalidate_from(index)
+
+        if len(self.items) > self.capacity:
+            dropped = self.items.pop()
+            self._index.pop(dropped["id"], None)
+            self.complete = False
+
+    def on_answer_created(self, answer: Answer) -> None:
+        self.record("answer_created", answer.question_id)
+        item = self._index.get(answer.question_id)
+        if item is None:
+            return
+
+        item["answers_count"] += 1
+        item["latest_answer"] = answer_preview(answer)
+        self.invalidate_page(self.items.index(item))
+
+    def on_question_deleted(self, q_id: int) -> None:
+        self.record("question_deleted", q_id)
+        item = self._index.pop(q_id, None)
+        if item is None:
+            return
+
+        index = self.items.index(item)
+        del self.items[index]
+        self._needs_fill = True
+        self.invalidate_from(index)
+
+    def on_answer_deleted(self, q_id: int, a_id: int) -> None:
+        self.record("answer_deleted", q_id)
+        item = self._index.get(q_id)
+        if item is None:
+            return
+
+        item["answers_count"] = max(item["answers_count"] - 1, 0)
+        latest = item["latest_answer"]
+        if latest is not None and latest["id"] == a_id:
+            # предыдущий ответ в снимке не хранится, его подтянет repair
+            item["latest_answer"] = None
+            self._stale_ids.add(q_id)
+
+        self.invalidate_page(self.items.index(item))
+
+
+feed_snapshot = FeedSnapshot()
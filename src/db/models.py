@@ -1,12 +1,30 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from datetime import datetime
-from sqlalchemy import func, ForeignKey, Text, Index
+from sqlalchemy import func, ForeignKey, Text, Index, Table, Column, LargeBinary
 
 
 class Base(DeclarativeBase):
     pass
 
 
+question_tags = Table(
+    "question_tags",
+    Base.metadata,
+    Column(
+        "question_id",
+        ForeignKey("questions.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(nullable=False, unique=True)
+
+
 class Question(Base):
     __tablename__ = "questions"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -21,6 +39,14 @@ class Question(Base):
         back_populates="question",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        order_by=lambda: (Answer.score.desc(), Answer.id.desc()),
+    )
+    tags: Mapped[list[Tag]] = relationship(
+        secondary=question_tags,
+        order_by=Tag.name,
+        # теги нужны не каждому запросу: кому нужны, грузит их явно
+        lazy="raise",
+        passive_deletes=True,
     )
 
 
@@ -35,8 +61,37 @@ class Answer(Base):
     created_at: Mapped[datetime] = mapped_column(
         default=func.now(), nullable=False, index=True
     )
+    score: Mapped[int] = mapped_column(default=0, server_default="0", nullable=False)
 
     question: Mapped[Question] = relationship(back_populates="answers")
 
 
+class AnswerVote(Base):
+    __tablename__ = "answer_votes"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    answer_id: Mapped[int] = mapped_column(
+        ForeignKey("answers.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[str] = mapped_column(nullable=False)
+    value: Mapped[int] = mapped_column(nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=func.now(), nullable=False)
+
+
+class ArchivedQuestion(Base):
+    __tablename__ = "archived_questions"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+    archived_at: Mapped[datetime] = mapped_column(default=func.now(), nullable=False)
+    # вопрос вместе с ответами и тегами: JSON, сжатый zlib
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
 Index("ix_answer_question_user", Answer.question_id, Answer.user_id)
+Index("ix_answers_question_score", Answer.question_id, Answer.score, Answer.id)
+Index("ix_questions_created_at_id", Question.created_at, Question.id)
+Index(
+    "ux_answer_votes_answer_user", AnswerVote.answer_id, AnswerVote.user_id, unique=True
+)
+Index(
+    "ix_question_tags_tag_question", question_tags.c.tag_id, question_tags.c.question_id
+)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Callable
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.db.models import Answer
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("VOTE_FLUSH_INTERVAL_SECONDS", "2"))
+
+answers_table = Answer.__table__
+
+ADD_SCORE_STMT = (
+    update(answers_table)
+    .where(answers_table.c.id == bindparam("a_id"))
+    .values(score=answers_table.c.score + bindparam("delta"))
+)
+
+
+class ScoreBuffer:
+    # голоса копятся в памяти воркера и пишутся в answers одной пачкой,
+    # так что горячий ответ не упирается в блокировку строки на каждый голос
+    def __init__(self):
+        self._deltas: defaultdict[int, int] = defaultdict(int)
+
+    def add(self, answer_id: int, delta: int) -> None:
+        self._deltas[answer_id] += delta
+
+    def pending(self, answer_id: int) -> int:
+        return self._deltas.get(answer_id, 0)
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def clear(self) -> None:
+        self._deltas.clear()
+
+    async def flush(self, session: AsyncSession) -> int:
+        deltas, self._deltas = self._deltas, defaultdict(int)
+        params = [
+            {"a_id": a_id, "delta": delta}
+            for a_id, delta in sorted(deltas.items())
+            if delta
+        ]
+        if not params:
+            return 0
+
+        try:
+            await session.execute(ADD_SCORE_STMT, params)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            for a_id, delta in deltas.items():
+                self._deltas[a_id] += delta
+            raise
+
+        return len(params)
+
+    async def run(
+        self,
+        make_session_maker: Callable[[], async_sessionmaker],
+        interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if not self._deltas:
+                continue
+
+            try:
+                async with make_session_maker()() as session:
+                    await self.flush(session)
+            except Exception:
+                logger.exception("failed to flush answer scores")
+
+
+score_buffer = ScoreBuffer()
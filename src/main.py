@@ -1,6 +1,51 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from src.app import endpoints
+from src.app import endpoints, profiling
+from src.app.compression import CompressionMiddleware
+from src.app.limiter import AdaptiveConcurrencyMiddleware
+from src.db.db_config import dispose_engine, make_session_maker
+from src.db.db_repository import warm_up
+from src.db.votes import score_buffer
+
+logger = logging.getLogger(__name__)
+
+WARM_UP = os.getenv("WARM_UP", "1") == "1"
+WARM_UP_CONNECTIONS = int(os.getenv("WARM_UP_CONNECTIONS", "5"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARM_UP:
+        try:
+            await warm_up(WARM_UP_CONNECTIONS)
+        except Exception:
+            # недоступная при старте БД не должна мешать воркеру подняться
+            logger.warning("warm-up failed", exc_info=True)
+
+    flusher = asyncio.create_task(score_buffer.run(make_session_maker))
+
+    yield
+
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+
+    if len(score_buffer):
+        async with make_session_maker()() as session:
+            await score_buffer.flush(session)
+
+    await dispose_engine()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+app.add_middleware(profiling.AllocationMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdaptiveConcurrencyMiddleware)
 
 app.include_router(endpoints.router)
+app.include_router(profiling.router, include_in_schema=False)
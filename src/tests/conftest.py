@@ -0,0 +1,137 @@
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+from src.db.models import Base
+from src.db.db_config import make_session
+from src.db.db_repository import archive_cache, tag_counts_cache
+from src.db.feed import feed_snapshot
+from src.db.votes import score_buffer
+from src.tests import postgres
+from httpx import ASGITransport, AsyncClient
+from src.main import app as fastapi_app
+
+
+# sqlite (по умолчанию) или postgres
+TEST_DATABASE = os.getenv("TEST_DATABASE", "sqlite")
+WORKER = os.getenv("PYTEST_XDIST_WORKER", "main")
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory):
+    # схема создаётся один раз на воркер, тесты изолируются откатом транзакции
+    if TEST_DATABASE == "postgres":
+        server_url = os.environ["TEST_DATABASE_URL"]
+        name = f"qa_test_{WORKER}"
+        yield postgres.create_worker_database(server_url, name)
+        postgres.drop_database(server_url, name)
+        return
+
+    path = tmp_path_factory.mktemp("db") / "test.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    yield f"sqlite+aiosqlite:///{path}"
+
+
+def setup_sqlite(engine) -> None:
+    # pysqlite сам решает, когда начинать транзакцию, и ломает SAVEPOINT;
+    # отключаем это и шлём BEGIN явно. Внешние ключи включаем, как в Postgres
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def on_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # кэши живут на уровне модуля, а id в свежей тестовой БД повторяются
+    archive_cache.clear()
+    tag_counts_cache.invalidate()
+    feed_snapshot.reset()
+    score_buffer.clear()
+    yield
+
+
+@pytest_asyncio.fixture()
+async def test_engine(database_url):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    if engine.dialect.name == "sqlite":
+        setup_sqlite(engine)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture()
+async def test_session(test_engine):
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        # commit/rollback в коде приложения работают с SAVEPOINT,
+        # внешняя транзакция откатывается после теста
+        test_sess = async_sessionmaker(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+        async def override_session() -> AsyncSession:
+            async with test_sess() as s:
+                yield s
+
+        fastapi_app.dependency_overrides[make_session] = override_session
+        try:
+            async with test_sess() as session:
+                yield session
+        finally:
+            await trans.rollback()
+            fastapi_app.dependency_overrides.pop(make_session, None)
+
+
+@pytest_asyncio.fixture()
+async def client(test_session):
+    async with AsyncClient(
+        transport=ASGITransport(app=fastapi_app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        # служебные команды транзакций в бюджет не входят
+        if statement.split(None, 1)[0].upper() not in (
+            "BEGIN",
+            "SAVEPOINT",
+            "RELEASE",
+            "ROLLBACK",
+            "SET",
+        ):
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture()
+def query_counter(test_engine):
+    counter = QueryCounter()
+    event.listen(test_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(test_engine.sync_engine, "before_cursor_execute", counter)
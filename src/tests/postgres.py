@@ -0,0 +1,144 @@
+import asyncio
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.db.models import Base
+
+TEMPLATE_DB = "qa_test_template"
+
+# настройки для одноразового кластера: данные не нужны после прогона,
+# поэтому долговечность меняем на скорость
+FAST_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+    "listen_addresses": "127.0.0.1",
+    "unix_socket_directories": "",
+}
+
+
+def find_pg_bin(name: str) -> Optional[str]:
+    if os.getenv("PG_BIN"):
+        path = os.path.join(os.environ["PG_BIN"], name)
+        return path if os.path.exists(path) else None
+
+    found = shutil.which(name)
+    if found:
+        return found
+
+    # в Debian/Ubuntu серверные утилиты не лежат в PATH
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class PostgresCluster:
+    # временный кластер в отдельной директории, живёт один прогон тестов
+    def __init__(self):
+        self.initdb = find_pg_bin("initdb")
+        self.pg_ctl = find_pg_bin("pg_ctl")
+        if self.initdb is None or self.pg_ctl is None:
+            raise RuntimeError(
+                "initdb/pg_ctl не найдены: установите PostgreSQL, укажите PG_BIN "
+                "или передайте готовый сервер через TEST_DATABASE_URL"
+            )
+
+        self.base_dir = tempfile.mkdtemp(prefix="qa-test-pg-")
+        self.data_dir = os.path.join(self.base_dir, "data")
+        self.port = free_port()
+
+    @property
+    def url(self) -> str:
+        return f"postgresql+asyncpg://postgres@127.0.0.1:{self.port}/postgres"
+
+    def start(self) -> None:
+        subprocess.run(
+            [self.initdb, "-D", self.data_dir, "-U", "postgres", "-A", "trust"]
+            + ["-E", "UTF8", "--no-sync"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        options = " ".join(f"-c {k}={v!r}" for k, v in FAST_SETTINGS.items())
+        subprocess.run(
+            [self.pg_ctl, "-D", self.data_dir, "-w", "start"]
+            + ["-o", f"-p {self.port} {options}"]
+            + ["-l", os.path.join(self.base_dir, "postgres.log")],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    def stop(self) -> None:
+        subprocess.run(
+            [self.pg_ctl, "-D", self.data_dir, "-m", "immediate", "stop"],
+            stdout=subprocess.DEVNULL,
+        )
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+
+def database_url(server_url: str, name: str) -> str:
+    return make_url(server_url).set(database=name).render_as_string(
+        hide_password=False
+    )
+
+
+async def run_admin(server_url: str, *statements: str) -> None:
+    # CREATE/DROP DATABASE нельзя выполнять внутри транзакции
+    engine = create_async_engine(
+        server_url, poolclass=NullPool, isolation_level="AUTOCOMMIT"
+    )
+    try:
+        async with engine.connect() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+    finally:
+        await engine.dispose()
+
+
+async def create_template(server_url: str) -> None:
+    await run_admin(
+        server_url,
+        f"DROP DATABASE IF EXISTS {TEMPLATE_DB}",
+        f"CREATE DATABASE {TEMPLATE_DB}",
+    )
+
+    engine = create_async_engine(
+        database_url(server_url, TEMPLATE_DB), poolclass=NullPool
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        # у шаблона не должно остаться соединений, иначе CREATE DATABASE упадёт
+        await engine.dispose()
+
+
+def create_worker_database(server_url: str, name: str) -> str:
+    # копия шаблона создаётся файловым копированием, без повторного DDL
+    asyncio.run(
+        run_admin(
+            server_url,
+            f"DROP DATABASE IF EXISTS {name}",
+            f"CREATE DATABASE {name} TEMPLATE {TEMPLATE_DB}",
+        )
+    )
+
+    return database_url(server_url, name)
+
+
+def drop_database(server_url: str, name: str) -> None:
+    asyncio.run(run_admin(server_url, f"DROP DATABASE IF EXISTS {name}"))
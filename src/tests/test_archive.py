@@ -0,0 +1,179 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql
+
+from src.db.archive import (
+    OLD_QUESTION_IDS_STMT,
+    archive_questions,
+    pack_question,
+    unpack_question,
+)
+from src.db.db_repository import archive_cache
+from src.db.models import Answer, ArchivedQuestion, Question
+from src.db.votes import score_buffer
+
+
+async def add_question(test_session, text: str, created_at: datetime) -> Question:
+    question = Question(text=text, created_at=created_at)
+    test_session.add(question)
+    await test_session.flush()
+
+    test_session.add_all(
+        [
+            Answer(
+                question_id=question.id,
+                user_id=f"test_id{i}",
+                text=f"{text} answer{i}",
+                created_at=created_at,
+            )
+            for i in range(2)
+        ]
+    )
+    await test_session.commit()
+
+    return question
+
+
+@pytest.mark.asyncio
+async def test_archive_questions_moves_only_old(test_session):
+    # given
+    old = await add_question(test_session, "old", datetime(2023, 1, 1, 12, 0, 0))
+    fresh = await add_question(test_session, "fresh", datetime(2025, 8, 1, 12, 0, 0))
+    old_id, fresh_id = old.id, fresh.id
+
+    # when
+    archived = await archive_questions(
+        test_session, older_than=datetime(2024, 1, 1), batch_size=1
+    )
+
+    hot_ids = (await test_session.execute(select(Question.id))).scalars().all()
+    archived_row = (
+        await test_session.execute(
+            select(ArchivedQuestion).where(ArchivedQuestion.id == old_id)
+        )
+    ).scalar_one()
+
+    # then
+    assert archived == 1
+    assert hot_ids == [fresh_id]
+    data = unpack_question(archived_row.payload)
+    assert data["text"] == "old"
+    assert {answer["text"] for answer in data["answers"]} == {
+        "old answer0",
+        "old answer1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_archive_questions_flushes_buffered_votes(test_session):
+    # given
+    question = await add_question(test_session, "old", datetime(2023, 1, 1, 12, 0, 0))
+    await test_session.refresh(question, ["answers"])
+    answer_id = question.answers[0].id
+    question_id = question.id
+    score_buffer.add(answer_id, 3)
+
+    # when
+    await archive_questions(test_session, older_than=datetime(2024, 1, 1))
+
+    archived_row = (
+        await test_session.execute(
+            select(ArchivedQuestion).where(ArchivedQuestion.id == question_id)
+        )
+    ).scalar_one()
+
+    # then
+    scores = {
+        answer["id"]: answer["score"]
+        for answer in unpack_question(archived_row.payload)["answers"]
+    }
+    assert scores[answer_id] == 3
+    assert len(score_buffer) == 0
+
+
+def test_old_questions_are_locked_on_postgres():
+    # when
+    sql = str(OLD_QUESTION_IDS_STMT.compile(dialect=postgresql.dialect()))
+
+    # then
+    # строки, занятые параллельным запуском, пропускаются, а не ждут
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+@pytest.mark.asyncio
+async def test_get_archived_question(client, test_session):
+    # given
+    question = await add_question(test_session, "old", datetime(2023, 1, 1, 12, 0, 0))
+    question_id = question.id
+    await archive_questions(test_session, older_than=datetime(2024, 1, 1))
+
+    # when
+    response = await client.get(f"/questions/{question_id}")
+    cached = await client.get(f"/questions/{question_id}")
+    data = response.json()
+
+    # then
+    assert response.status_code == status.HTTP_200_OK
+    assert cached.json() == data
+    assert data["id"] == question_id
+    assert data["text"] == "old"
+    assert data["created_at"] == "2023-01-01T12:00:00"
+    assert len(data["answers"]) == 2
+    assert archive_cache.get(question_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_delete_archived_question(client, test_session):
+    # given
+    question = await add_question(test_session, "old", datetime(2023, 1, 1, 12, 0, 0))
+    question_id = question.id
+    await archive_questions(test_session, older_than=datetime(2024, 1, 1))
+    await client.get(f"/questions/{question_id}")
+
+    # when
+    response = await client.delete(f"/questions/{question_id}")
+
+    # then
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert archive_cache.get(question_id) is None
+    assert (await client.get(f"/questions/{question_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_archive_cache_expires(client, test_session, monkeypatch):
+    # given
+    question = await add_question(test_session, "old", datetime(2023, 1, 1, 12, 0, 0))
+    question_id = question.id
+    await archive_questions(test_session, older_than=datetime(2024, 1, 1))
+    monkeypatch.setattr(archive_cache, "ttl", 0)
+    await client.get(f"/questions/{question_id}")
+
+    # when
+    # удаление через другой воркер: кэш этого воркера о нём не знает
+    await test_session.execute(
+        delete(ArchivedQuestion).where(ArchivedQuestion.id == question_id)
+    )
+    await test_session.commit()
+    response = await client.get(f"/questions/{question_id}")
+
+    # then
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_pack_question_is_compact(test_session):
+    # given
+    question = await add_question(
+        test_session, "why " * 200, datetime(2023, 1, 1, 12, 0, 0)
+    )
+    await test_session.refresh(question, ["answers", "tags"])
+
+    # when
+    payload = pack_question(question)
+
+    # then
+    assert len(payload) < len(question.text)
+    assert unpack_question(payload)["text"] == question.text
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from src.bench.generate import generate
+from src.bench.replay import (
+    Result,
+    load_trace,
+    percentile,
+    replay,
+    route_of,
+    save_trace,
+    summarize,
+    synthetic_trace,
+)
+from src.db.models import Answer, Question, question_tags
+
+
+@pytest.mark.asyncio
+async def test_generate(test_session):
+    # given
+    now = datetime(2025, 9, 1)
+
+    # when
+    questions, answers = await generate(
+        test_session,
+        questions=300,
+        max_answers=50,
+        days=30,
+        batch_size=100,
+        seed=1,
+        now=now,
+    )
+
+    counts = (
+        (
+            await test_session.execute(
+                select(func.count(Answer.id))
+                .select_from(Question)
+                .outerjoin(Answer)
+                .group_by(Question.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    created = (
+        await test_session.execute(
+            select(func.min(Question.created_at), func.max(Answer.created_at)).join(
+                Answer, isouter=True
+            )
+        )
+    ).one()
+    tagged = (
+        await test_session.execute(select(func.count()).select_from(question_tags))
+    ).scalar_one()
+    timeline = (
+        (await test_session.execute(select(Question.created_at).order_by(Question.id)))
+        .scalars()
+        .all()
+    )
+
+    # then
+    assert questions == 300
+    assert len(counts) == 300
+    assert sum(counts) == answers
+    # распределение с тяжёлым хвостом: без ответов чаще всего, но есть длинные
+    assert counts.count(0) > 300 / 4
+    assert max(counts) > 10 * answers / 300
+    assert created[0] >= now - timedelta(days=30)
+    assert created[1] <= now
+    assert tagged > 0
+    assert timeline == sorted(timeline)
+
+
+@pytest.mark.asyncio
+async def test_generate_continues_ids(test_session):
+    # given
+    test_session.add(Question(text="existing"))
+    await test_session.commit()
+
+    # when
+    await generate(test_session, questions=10, max_answers=5, tags=0, seed=1)
+    await generate(test_session, questions=10, max_answers=5, tags=0, seed=2)
+
+    # then
+    total = (await test_session.execute(select(func.count(Question.id)))).scalar_one()
+    assert total == 21
+
+
+def test_synthetic_trace():
+    # when
+    trace = synthetic_trace(
+        duration=100,
+        rate=50,
+        write_ratio=0.2,
+        max_question_id=1000,
+        max_answer_id=5000,
+        seed=1,
+    )
+
+    # then
+    writes = sum(entry["method"] == "POST" for entry in trace)
+    assert 4500 < len(trace) < 5500
+    assert 0.15 < writes / len(trace) < 0.25
+    assert all(0 <= entry["t"] < 100 for entry in trace)
+    assert [entry["t"] for entry in trace] == sorted(entry["t"] for entry in trace)
+
+
+def test_trace_roundtrip(tmp_path):
+    # given
+    trace = synthetic_trace(1, 20, 0.5, 10, 10, seed=1)
+    path = tmp_path / "trace.jsonl"
+
+    # when
+    save_trace(path, trace)
+
+    # then
+    assert load_trace(path) == trace
+
+
+def test_route_of():
+    assert route_of("GET", "/questions/15") == "GET /questions/{id}"
+    assert route_of("POST", "/questions/15/answers/") == "POST /questions/{id}/answers/"
+    assert route_of("GET", "/feed/?page=2") == "GET /feed/"
+
+
+def test_summarize():
+    # given
+    results = [Result("GET /feed/", 200, i / 1000, 0) for i in range(1, 101)]
+    results.append(Result("GET /feed/", 503, 0.5, 0))
+
+    # when
+    summary = summarize(results)
+
+    # then
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert summary["GET /feed/"]["count"] == 101
+    assert summary["GET /feed/"]["errors"] == 1
+    assert summary["GET /feed/"]["p50"] == pytest.approx(51)
+    assert summary["total"]["max"] == pytest.approx(500)
+
+
+def test_summarize_empty():
+    assert summarize([]) == {}
+
+
+@pytest.mark.asyncio
+async def test_replay_is_open_loop():
+    # given
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.1)
+        return httpx.Response(404 if "answers" in request.url.path else 200)
+
+    trace = [
+        {"t": i / 1000, "method": "GET", "path": f"/answers/{i}"} for i in range(20)
+    ]
+    trace.append({"t": 0.01, "method": "GET", "path": "/feed/?page=1"})
+
+    # when
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="http://test"
+    ) as client:
+        started = time.perf_counter()
+        results = await replay(client, trace)
+        elapsed = time.perf_counter() - started
+
+    # then
+    # следующий запрос не ждёт ответа на предыдущий
+    assert elapsed < 1
+    assert len(results) == 21
+    assert {result.route for result in results} == {"GET /answers/{id}", "GET /feed/"}
+    assert all(result.latency >= 0.1 for result in results)
@@ -0,0 +1,134 @@
+from datetime import datetime
+
+import pytest
+
+from src.db.models import Answer, Question, Tag
+
+# бюджеты запросов к БД на один HTTP-запрос; не должны зависеть от объёма данных
+
+
+async def add_questions(test_session, count: int, answers: int = 3) -> list[Question]:
+    tag = Tag(name="python")
+    questions = [
+        Question(
+            text=f"test{i}", created_at=datetime(2025, 8, 1, 12, 0, i), tags=[tag]
+        )
+        for i in range(count)
+    ]
+    test_session.add_all(questions)
+    await test_session.flush()
+
+    test_session.add_all(
+        [
+            Answer(question_id=q.id, user_id=f"test_id{j}", text=f"answer{j}")
+            for q in questions
+            for j in range(answers)
+        ]
+    )
+    await test_session.commit()
+
+    return questions
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [1, 10])
+async def test_get_questions_budget(client, test_session, query_counter, count):
+    # given
+    await add_questions(test_session, count)
+    query_counter.reset()
+
+    # when
+    response = await client.get("/questions/?tag=python")
+
+    # then
+    assert len(response.json()) == count
+    assert query_counter.count <= 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("answers", [1, 10])
+async def test_get_question_with_answers_budget(
+    client, test_session, query_counter, answers
+):
+    # given
+    [question] = await add_questions(test_session, 1, answers)
+    query_counter.reset()
+
+    # when
+    response = await client.get(f"/questions/{question.id}")
+
+    # then
+    assert len(response.json()["answers"]) == answers
+    assert query_counter.count <= 3
+
+
+@pytest.mark.asyncio
+async def test_feed_budget(client, test_session, query_counter):
+    # given
+    await add_questions(test_session, 10)
+    query_counter.reset()
+
+    # when
+    await client.get("/feed/")
+    cold = query_counter.count
+    query_counter.reset()
+    await client.get("/feed/")
+    warm = query_counter.count
+
+    # then
+    assert cold <= 3
+    assert warm == 0
+
+
+@pytest.mark.asyncio
+async def test_tag_counts_budget(client, test_session, query_counter):
+    # given
+    await add_questions(test_session, 10)
+    query_counter.reset()
+
+    # when
+    await client.get("/tags/")
+    cold = query_counter.count
+    query_counter.reset()
+    await client.get("/tags/")
+    warm = query_counter.count
+
+    # then
+    assert cold == 1
+    assert warm == 0
+
+
+@pytest.mark.asyncio
+async def test_vote_budget(client, test_session, query_counter):
+    # given
+    [question] = await add_questions(test_session, 1, 1)
+    [answer] = (await client.get(f"/questions/{question.id}")).json()["answers"]
+    query_counter.reset()
+
+    # when
+    response = await client.post(
+        f"/answers/{answer['id']}/vote", json={"user_id": "voter"}
+    )
+
+    # then
+    assert response.status_code == 201
+    # счёт ответа обновляется пачкой в фоне, а не в запросе голосования
+    assert query_counter.count <= 2
+
+
+@pytest.mark.asyncio
+async def test_create_answer_budget(client, test_session, query_counter):
+    # given
+    [question] = await add_questions(test_session, 1, 0)
+    query_counter.reset()
+
+    # when
+    response = await client.post(
+        f"/questions/{question.id}/answers/",
+        json={"user_id": "test_id", "text": "answer"},
+    )
+
+    # then
+    assert response.status_code == 201
+    # проверка, что вопрос существует, не тянет его теги
+    assert query_counter.count <= 3
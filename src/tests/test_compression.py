@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.app.compression import (
+    CompressionMiddleware,
+    PrecompressedBody,
+    select_encoding,
+)
+from src.db.models import Question
+
+
+def test_select_encoding():
+    assert select_encoding("") is None
+    assert select_encoding("identity") is None
+    assert select_encoding("gzip") == "gzip"
+    assert select_encoding("gzip;q=0.5, deflate") == "gzip"
+    assert select_encoding("gzip;q=0") is None
+    assert select_encoding("*;q=0, gzip;q=0.1") == "gzip"
+
+
+@pytest.mark.asyncio
+async def test_questions_list_compressed(client, test_session):
+    # given
+    test_session.add_all([Question(text=f"test question {i}") for i in range(50)])
+    await test_session.commit()
+
+    # when
+    response = await client.get("/questions/", headers={"Accept-Encoding": "gzip"})
+
+    # then
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(response.json()) == 50
+
+
+@pytest.mark.asyncio
+async def test_small_response_not_compressed(client):
+    # when
+    response = await client.get("/questions/", headers={"Accept-Encoding": "gzip"})
+
+    # then
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_compressed():
+    # given
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f'{{"chunk": {i}}}\n'.encode()
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    # when
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        async with client.stream(
+            "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+    # then
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).count(b"chunk") == 5
+
+
+def test_precompressed_body_encodes_once():
+    # given
+    entry = PrecompressedBody(b'{"text": "' + b"a" * 1000 + b'"}', minimum_size=100)
+
+    # when
+    first = entry.to_response("gzip")
+    second = entry.to_response("gzip")
+    plain = entry.to_response("")
+
+    # then
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.body is second.body
+    assert gzip.decompress(first.body) == entry.body
+    assert plain.body == entry.body
+    assert "content-encoding" not in plain.headers
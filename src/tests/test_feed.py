@@ -0,0 +1,179 @@
+from datetime import datetime
+
+import pytest
+from fastapi import status
+
+from src.db.feed import FEED_PAGES, FeedSnapshot, feed_snapshot
+from src.db.models import Answer, Question
+
+
+@pytest.fixture()
+def small_feed(monkeypatch):
+    snapshot = FeedSnapshot(page_size=2, pages=2, max_staleness=60)
+    monkeypatch.setattr(feed_snapshot, "__dict__", snapshot.__dict__)
+    return feed_snapshot
+
+
+async def add_questions(test_session, count: int) -> list[Question]:
+    questions = [
+        Question(text=f"test{i}", created_at=datetime(2025, 8, 1, 12, 0, i))
+        for i in range(count)
+    ]
+    test_session.add_all(questions)
+    await test_session.commit()
+
+    return questions
+
+
+@pytest.mark.asyncio
+async def test_get_feed(client, test_session, small_feed):
+    # given
+    questions = await add_questions(test_session, 3)
+    test_session.add_all(
+        [
+            Answer(
+                question_id=questions[2].id,
+                user_id="test_id",
+                text=f"answer{i}",
+                created_at=datetime(2025, 8, 2, 12, 0, i),
+            )
+            for i in range(2)
+        ]
+    )
+    await test_session.commit()
+
+    # when
+    first = await client.get("/feed/")
+    second = await client.get("/feed/?page=1")
+
+    # then
+    assert first.status_code == status.HTTP_200_OK
+    assert float(first.headers["x-feed-snapshot-age"]) >= 0
+    data = first.json()
+    assert [item["text"] for item in data] == ["test2", "test1"]
+    assert data[0]["answers_count"] == 2
+    assert data[0]["latest_answer"]["text"] == "answer1"
+    assert data[1]["answers_count"] == 0
+    assert data[1]["latest_answer"] is None
+    assert [item["text"] for item in second.json()] == ["test0"]
+
+
+@pytest.mark.asyncio
+async def test_feed_incremental_updates(client, test_session, small_feed):
+    # given
+    await add_questions(test_session, 4)
+    await client.get("/feed/")
+    built_at = small_feed.built_at
+
+    # when
+    created = (await client.post("/questions/", json={"text": "new"})).json()
+    answer = (
+        await client.post(
+            f"/questions/{created['id']}/answers/",
+            json={"user_id": "test_id", "text": "fresh answer"},
+        )
+    ).json()
+    after_create = (await client.get("/feed/")).json()
+
+    await client.delete(f"/answers/{answer['id']}")
+    await client.delete(f"/questions/{after_create[1]['id']}")
+    first_page = (await client.get("/feed/")).json()
+    second_page = (await client.get("/feed/?page=1")).json()
+
+    # then
+    assert small_feed.built_at == built_at
+    assert after_create[0]["text"] == "new"
+    assert after_create[0]["answers_count"] == 1
+    assert after_create[0]["latest_answer"]["text"] == "fresh answer"
+    assert [item["text"] for item in first_page] == ["new", "test2"]
+    assert first_page[0]["answers_count"] == 0
+    assert first_page[0]["latest_answer"] is None
+    assert [item["text"] for item in second_page] == ["test1", "test0"]
+
+
+@pytest.mark.asyncio
+async def test_feed_rebuilt_after_staleness_bound(client, test_session, small_feed):
+    # given
+    await add_questions(test_session, 1)
+    await client.get("/feed/")
+
+    test_session.add(Question(text="other worker", created_at=datetime(2025, 9, 1)))
+    await test_session.commit()
+
+    # when
+    cached = (await client.get("/feed/")).json()
+    small_feed.max_staleness = 0
+    rebuilt = (await client.get("/feed/")).json()
+
+    # then
+    assert [item["text"] for item in cached] == ["test0"]
+    assert [item["text"] for item in rebuilt] == ["other worker", "test0"]
+
+
+@pytest.mark.asyncio
+async def test_feed_rebuild_keeps_concurrent_writes(
+    test_session, small_feed, monkeypatch
+):
+    # given
+    [question] = await add_questions(test_session, 1)
+    question_id = question.id
+    load_items = small_feed.load_items
+    writes = []
+
+    async def load_with_concurrent_write(session, stmt):
+        items = await load_items(session, stmt)
+        if not writes:
+            # запись закоммичена после чтения из БД, но до замены снимка
+            created = Question(
+                text="during rebuild", created_at=datetime(2025, 9, 1), tags=[]
+            )
+            answer = Answer(question_id=question_id, user_id="test_id", text="a")
+            session.add_all([created, answer])
+            await session.commit()
+            writes.extend([created, answer])
+            small_feed.on_question_created(created)
+            small_feed.on_answer_created(answer)
+        return items
+
+    monkeypatch.setattr(small_feed, "load_items", load_with_concurrent_write)
+
+    # when
+    await small_feed.refresh(test_session)
+    rebuilt = [item["text"] for item in small_feed.page(0)]
+    await small_feed.refresh(test_session)
+
+    # then
+    assert rebuilt == ["during rebuild", "test0"]
+    assert small_feed.page(0)[1]["answers_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_feed_page_out_of_snapshot(client):
+    # when
+    response = await client.get(f"/feed/?page={FEED_PAGES}")
+
+    # then
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_questions_page_served_from_feed(client, test_session, small_feed):
+    # given
+    await add_questions(test_session, 3)
+    await client.get("/feed/")
+
+    test_session.add(Question(text="not in snapshot", created_at=datetime(2025, 9, 1)))
+    await test_session.commit()
+
+    # when
+    first = await client.get("/questions/?limit=2")
+    second = await client.get(
+        f"/questions/?limit=2&cursor={first.headers['x-next-cursor']}"
+    )
+    full = await client.get("/questions/")
+
+    # then
+    assert [q["text"] for q in first.json()] == ["test2", "test1"]
+    assert [q["text"] for q in second.json()] == ["test0"]
+    assert "x-next-cursor" not in second.headers
+    assert full.json()[0]["text"] == "not in snapshot"
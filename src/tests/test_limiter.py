@@ -0,0 +1,190 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from src.app.limiter import AdaptiveConcurrencyMiddleware, AIMDLimiter
+from src.db.db_config import DeadlineExceeded, request_deadline
+
+
+def test_aimd_limiter_decreases_on_slow_requests():
+    # given
+    limiter = AIMDLimiter(initial_limit=10, latency_target=0.1)
+
+    # when
+    assert limiter.try_acquire()
+    limiter.release(latency=0.5)
+
+    # then
+    assert limiter.limit == pytest.approx(9.0)
+    assert limiter.in_flight == 0
+
+
+def test_aimd_limiter_grows_only_when_used():
+    # given
+    limiter = AIMDLimiter(initial_limit=2, latency_target=0.1)
+
+    # when
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release(latency=0.01)
+    limiter.release(latency=0.01)
+
+    # then
+    assert limiter.limit > 2
+    assert limiter.in_flight == 0
+
+
+def test_aimd_limiter_decreases_once_per_burst():
+    # given
+    limiter = AIMDLimiter(initial_limit=100, latency_target=0.25)
+
+    # when
+    # сто запросов начались одновременно и все оказались медленными
+    for _ in range(100):
+        assert limiter.try_acquire()
+    for _ in range(100):
+        limiter.release(latency=0.3)
+
+    # then
+    assert limiter.limit == pytest.approx(90.0)
+
+
+def test_aimd_limiter_respects_bounds():
+    # given
+    limiter = AIMDLimiter(initial_limit=2, latency_target=0.1, min_limit=1)
+
+    # when
+    for _ in range(20):
+        limiter.try_acquire()
+        limiter.release(latency=0.0, dropped=True)
+
+    # then
+    assert limiter.limit == 1.0
+
+
+def make_app(read_limit: int = 1, write_limit: int = 1) -> tuple[FastAPI, asyncio.Event]:
+    app = FastAPI()
+    app.add_middleware(
+        AdaptiveConcurrencyMiddleware,
+        read_limiter=AIMDLimiter(initial_limit=read_limit, latency_target=10),
+        write_limiter=AIMDLimiter(initial_limit=write_limit, latency_target=10),
+        deadline=2.0,
+    )
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"deadline_left": request_deadline.get() - time.monotonic()}
+
+    @app.post("/write")
+    async def write():
+        return {"ok": True}
+
+    @app.get("/overloaded")
+    async def overloaded():
+        raise DeadlineExceeded()
+
+    @app.get("/pool-exhausted")
+    async def pool_exhausted():
+        raise PoolTimeout("QueuePool limit reached")
+
+    @app.get("/admin/ping")
+    async def admin_ping():
+        return {"ok": True}
+
+    return app, release
+
+
+@pytest.mark.asyncio
+async def test_excess_reads_rejected_fast():
+    # given
+    app, release = make_app()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        # when
+        rejected = await client.get("/slow")
+        write = await client.post("/write")
+        release.set()
+        accepted = await first
+
+    # then
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "1"
+    assert rejected.json()["detail"] == "service_overloaded"
+    assert write.status_code == 200
+    assert accepted.status_code == 200
+    assert 0 < accepted.json()["deadline_left"] <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_deadline_exceeded_mapped_to_503():
+    # given
+    app, _ = make_app()
+
+    # when
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/overloaded")
+        pool_response = await client.get("/pool-exhausted")
+
+    # then
+    assert response.status_code == 503
+    assert pool_response.status_code == 503
+    assert request_deadline.get() is None
+
+
+@pytest.mark.asyncio
+async def test_admin_routes_not_limited():
+    # given
+    app, release = make_app()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.05)
+
+        # when
+        admin = await client.get("/admin/ping")
+        release.set()
+        await first
+
+    # then
+    assert admin.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_app_errors_do_not_shrink_limit():
+    # given
+    limiter = AIMDLimiter(initial_limit=10, latency_target=10)
+    app = FastAPI()
+    app.add_middleware(
+        AdaptiveConcurrencyMiddleware, read_limiter=limiter, write_limiter=limiter
+    )
+
+    @app.get("/bug")
+    async def bug():
+        raise RuntimeError("bug")
+
+    # when
+    async with AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://test",
+    ) as client:
+        response = await client.get("/bug")
+
+    # then
+    assert response.status_code == 500
+    assert limiter.limit == 10.0
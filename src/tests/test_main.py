@@ -1,56 +1,12 @@
-import pytest_asyncio
 import pytest
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.pool import StaticPool
-from src.db.models import Base, Question, Answer
-from src.db.db_config import make_session
-from httpx import ASGITransport, AsyncClient
-from src.main import app as fastapi_app
-from datetime import datetime
+from src.db.models import Question, Answer, AnswerVote, Tag
+from src.db.votes import score_buffer
+from datetime import datetime, timezone
 from fastapi import status
-from sqlalchemy import select, text
-
-
-@pytest_asyncio.fixture()
-async def test_engine():
-    engine = create_async_engine(
-        "sqlite+aiosqlite:///:memory:",
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    try:
-        yield engine
-    finally:
-        await engine.dispose()
-
-
-@pytest_asyncio.fixture()
-async def test_session(test_engine):
-    async with test_engine.connect() as conn:
-        trans = await conn.begin()
-        test_sess = async_sessionmaker(bind=conn, expire_on_commit=False)
-
-        async def override_session() -> AsyncSession:
-            async with test_sess() as s:
-                yield s
-
-        fastapi_app.dependency_overrides[make_session] = override_session
-        try:
-            async with test_sess() as session:
-                yield session
-        finally:
-            await trans.rollback()
-            fastapi_app.dependency_overrides.pop(make_session, None)
-
-
-@pytest_asyncio.fixture()
-async def client(test_session):
-    async with AsyncClient(
-        transport=ASGITransport(app=fastapi_app), base_url="http://test"
-    ) as client:
-        yield client
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.db_repository import TAGS_BY_NAMES_STMT, AnswersRepository
+from src.app.pagination import encode_cursor
 
 
 @pytest.mark.asyncio
@@ -93,13 +49,151 @@ async def test_create_question(client, test_session):
 
     # then
     assert response.status_code == status.HTTP_201_CREATED
-    assert set(data.keys()) == {"id", "text", "created_at"}
+    assert set(data.keys()) == {"id", "text", "created_at", "tags"}
     assert isinstance(data["id"], int)
     assert data["text"] == "test_text"
+    assert data["tags"] == []
     assert questions is not None
     assert questions.text == "test_text"
 
 
+@pytest.mark.asyncio
+async def test_create_question_with_tags(client, test_session):
+    # given
+    questions_params = {"text": "test_text", "tags": [" Python ", "sql", "python"]}
+
+    # when
+    response = await client.post("/questions/", json=questions_params)
+    data = response.json()
+
+    tags = (await test_session.execute(select(Tag.name))).scalars().all()
+
+    # then
+    assert response.status_code == status.HTTP_201_CREATED
+    assert data["tags"] == ["python", "sql"]
+    assert sorted(tags) == ["python", "sql"]
+
+
+@pytest.mark.asyncio
+async def test_create_question_with_tag_created_concurrently(
+    client, test_session, monkeypatch
+):
+    # given
+    test_session.add(Tag(name="python"))
+    await test_session.commit()
+
+    execute = AsyncSession.execute
+    stale_reads = []
+
+    async def stale_tags_read(session, statement, params=None, **kwargs):
+        if statement is TAGS_BY_NAMES_STMT and not stale_reads:
+            # тег создал параллельный запрос уже после нашего чтения
+            stale_reads.append(params)
+            params = {"names": []}
+        return await execute(session, statement, params, **kwargs)
+
+    monkeypatch.setattr(AsyncSession, "execute", stale_tags_read)
+
+    # when
+    response = await client.post(
+        "/questions/", json={"text": "test_text", "tags": ["python", "sql"]}
+    )
+    monkeypatch.undo()
+
+    tags = (await test_session.execute(select(Tag.name))).scalars().all()
+
+    # then
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["tags"] == ["python", "sql"]
+    assert sorted(tags) == ["python", "sql"]
+    assert stale_reads
+
+
+@pytest.mark.asyncio
+async def test_get_questions_filter_by_tags(client):
+    # given
+    for text, tags in [
+        ("test1", ["python"]),
+        ("test2", ["python", "sql"]),
+        ("test3", ["sql"]),
+        ("test4", []),
+    ]:
+        await client.post("/questions/", json={"text": text, "tags": tags})
+
+    # when
+    all_response = await client.get("/questions/?tag=python&tag=sql")
+    any_response = await client.get("/questions/?tag=python&tag=sql&match=any")
+    one_response = await client.get("/questions/?tag=Python")
+
+    # then
+    assert [q["text"] for q in all_response.json()] == ["test2"]
+    assert {q["text"] for q in any_response.json()} == {"test1", "test2", "test3"}
+    assert {q["text"] for q in one_response.json()} == {"test1", "test2"}
+
+
+@pytest.mark.asyncio
+async def test_get_questions_cursor_pagination(client, test_session):
+    # given
+    test_session.add_all(
+        [
+            Question(text=f"test{i}", created_at=datetime(2025, 8, 1, 12, 0, i))
+            for i in range(5)
+        ]
+    )
+    await test_session.commit()
+
+    # when
+    first = await client.get("/questions/?limit=2")
+    second = await client.get(
+        f"/questions/?limit=2&cursor={first.headers['x-next-cursor']}"
+    )
+    third = await client.get(
+        f"/questions/?limit=2&cursor={second.headers['x-next-cursor']}"
+    )
+
+    # then
+    assert [q["text"] for q in first.json()] == ["test4", "test3"]
+    assert [q["text"] for q in second.json()] == ["test2", "test1"]
+    assert [q["text"] for q in third.json()] == ["test0"]
+    assert "x-next-cursor" not in third.headers
+
+
+@pytest.mark.asyncio
+async def test_get_questions_invalid_cursor(client):
+    # given
+    # страница с таким курсором отдавалась бы из снимка ленты
+    await client.post("/questions/", json={"text": "test1"})
+    await client.get("/feed/")
+    aware = encode_cursor(datetime(2030, 1, 1, tzinfo=timezone.utc), 5)
+
+    # when
+    response = await client.get("/questions/?limit=2&cursor=broken")
+    aware_response = await client.get(f"/questions/?limit=2&cursor={aware}")
+
+    # then
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "invalid_cursor"
+    assert aware_response.status_code == status.HTTP_400_BAD_REQUEST
+    assert aware_response.json()["detail"] == "invalid_cursor"
+
+
+@pytest.mark.asyncio
+async def test_get_tag_counts(client):
+    # given
+    await client.post("/questions/", json={"text": "test1", "tags": ["python"]})
+    await client.post("/questions/", json={"text": "test2", "tags": ["python", "sql"]})
+
+    # when
+    response = await client.get("/tags/")
+
+    # then
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [
+        {"name": "python", "count": 2},
+        {"name": "sql", "count": 1},
+    ]
+
+
 @pytest.mark.asyncio
 async def test_get_question_with_answers_404(client):
     # when
@@ -216,8 +310,6 @@ async def test_delete_question_success(client, test_session):
 @pytest.mark.asyncio
 async def test_delete_question_with_answers(client, test_session):
     # given
-    await test_session.execute(text("PRAGMA foreign_keys=ON"))
-
     questions_params = Question(text="test text")
 
     test_session.add(questions_params)
@@ -308,11 +400,19 @@ async def test_create_answer_success(client, test_session):
 
     # then
     assert response.status_code == status.HTTP_201_CREATED
-    assert set(data.keys()) == {"id", "question_id", "user_id", "text", "created_at"}
+    assert set(data.keys()) == {
+        "id",
+        "question_id",
+        "user_id",
+        "text",
+        "created_at",
+        "score",
+    }
     assert isinstance(data["id"], int)
     assert data["question_id"] == questions_params.id
     assert data["user_id"] == answer_params["user_id"]
     assert data["text"] == "test_answer"
+    assert data["score"] == 0
 
     assert db_answer is not None
     assert db_answer.question_id == questions_params.id
@@ -356,7 +456,14 @@ async def test_get_answer_success(client, test_session):
 
     # then
     assert response.status_code == status.HTTP_200_OK
-    assert set(data.keys()) == {"id", "question_id", "user_id", "text", "created_at"}
+    assert set(data.keys()) == {
+        "id",
+        "question_id",
+        "user_id",
+        "text",
+        "created_at",
+        "score",
+    }
     assert data["id"] == answer_id
     assert data["question_id"] == questions_params.id
     assert data["user_id"] == "test_id"
@@ -434,3 +541,110 @@ async def test_delete_answer_success_without_question(client, test_session):
             select(Question).where(Question.id == questions_params.id)
         )
     ).scalar_one_or_none() is not None
+
+
+@pytest.mark.asyncio
+async def test_vote_answer_404(client):
+    # when
+    response = await client.post("/answers/999999/vote", json={"user_id": "test_id"})
+
+    # then
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "answer_not_found"
+
+
+@pytest.mark.asyncio
+async def test_vote_answer_deleted_before_insert(client, test_session, monkeypatch):
+    # given
+    question = Question(text="test text")
+    test_session.add(question)
+    await test_session.flush()
+    answer = Answer(question_id=question.id, user_id="test_id", text="test answer")
+    test_session.add(answer)
+    await test_session.commit()
+    answer_id = answer.id
+
+    get_answer_by_id = AnswersRepository.get_answer_by_id
+
+    async def deleted_after_check(repository, a_id):
+        found = await get_answer_by_id(repository, a_id)
+        await repository.session.execute(delete(Answer).where(Answer.id == a_id))
+        return found
+
+    monkeypatch.setattr(AnswersRepository, "get_answer_by_id", deleted_after_check)
+
+    # when
+    response = await client.post(f"/answers/{answer_id}/vote", json={"user_id": "voter"})
+
+    # then
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "answer_not_found"
+    assert score_buffer.pending(answer_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_vote_answer_once_per_user(client, test_session):
+    # given
+    questions_params = Question(text="test text")
+    test_session.add(questions_params)
+    await test_session.flush()
+
+    answer = Answer(
+        question_id=questions_params.id, user_id="test_id", text="test answer"
+    )
+    test_session.add(answer)
+    await test_session.commit()
+
+    vote_params = {"user_id": "voter", "value": -1}
+
+    # when
+    response = await client.post(f"/answers/{answer.id}/vote", json=vote_params)
+    response2 = await client.post(f"/answers/{answer.id}/vote", json=vote_params)
+
+    votes = (
+        (
+            await test_session.execute(
+                select(AnswerVote).where(AnswerVote.answer_id == answer.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    # then
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == {"answer_id": answer.id, "user_id": "voter", "value": -1}
+    assert response2.status_code == status.HTTP_409_CONFLICT
+    assert response2.json()["detail"] == "vote_already_exists"
+    assert len(votes) == 1
+    assert score_buffer.pending(answer.id) == -1
+
+
+@pytest.mark.asyncio
+async def test_question_answers_top_first(client, test_session):
+    # given
+    questions_params = Question(text="test text")
+    test_session.add(questions_params)
+    await test_session.flush()
+
+    answers = [
+        Answer(question_id=questions_params.id, user_id="test_id", text=f"answer{i}")
+        for i in range(3)
+    ]
+    test_session.add_all(answers)
+    await test_session.commit()
+
+    for user_id in ("voter1", "voter2"):
+        await client.post(f"/answers/{answers[1].id}/vote", json={"user_id": user_id})
+    await client.post(f"/answers/{answers[2].id}/vote", json={"user_id": "voter1"})
+
+    # when
+    flushed = await score_buffer.flush(test_session)
+    response = await client.get(f"/questions/{questions_params.id}")
+    data = response.json()
+
+    # then
+    assert flushed == 2
+    assert len(score_buffer) == 0
+    assert [ans["text"] for ans in data["answers"]] == ["answer1", "answer2", "answer0"]
+    assert [ans["score"] for ans in data["answers"]] == [2, 1, 0]
@@ -0,0 +1,139 @@
+from migrations.check_blocking import check_file, main
+
+REVISION = '''
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade() -> None:
+{body}
+
+
+def downgrade() -> None:
+    op.drop_index("ix_anything", table_name="answers")
+'''
+
+
+def write_revision(tmp_path, body: str):
+    path = tmp_path / "revision.py"
+    path.write_text(REVISION.format(body=body))
+    return path
+
+
+def test_repository_revisions_pass():
+    assert main([]) == 0
+
+
+def test_create_index_on_existing_table_flagged(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path, '    op.create_index("ix_answers_text", "answers", ["text"])'
+    )
+
+    # when
+    findings = check_file(path)
+
+    # then
+    assert len(findings) == 1
+    assert "create_index_concurrently" in findings[0].message
+    assert findings[0].line == 7
+
+
+def test_safe_operations_pass(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path,
+        """    op.create_table("tags", sa.Column("id", sa.Integer(), primary_key=True))
+    op.create_index("ix_tags_id", "tags", ["id"])
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_answers_text", "answers", ["text"], postgresql_concurrently=True
+        )
+    op.add_column("answers", sa.Column("score", sa.Integer(), server_default="0", nullable=False))
+    op.create_index("ix_answers_user", "answers", ["user_id"])  # migration-check: ignore""",
+    )
+
+    # then
+    assert check_file(path) == []
+
+
+def test_blocking_operations_flagged(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path,
+        """    op.add_column("answers", sa.Column("rank", sa.Integer(), nullable=False))
+    op.alter_column("answers", "text", type_=sa.Text(), nullable=False)
+    op.create_foreign_key("fk", "answers", "questions", ["question_id"], ["id"])
+    op.execute("CREATE INDEX ix_x ON answers (text)")
+    op.execute("VACUUM FULL answers")""",
+    )
+
+    # when
+    findings = check_file(path)
+
+    # then
+    assert [finding.line for finding in findings] == [7, 8, 8, 9, 10, 11]
+
+
+def test_concurrent_index_with_other_ddl_flagged(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path,
+        """    op.create_table("tags", sa.Column("id", sa.Integer(), primary_key=True))
+    create_index_concurrently("ix_answers_text", "answers", ["text"])""",
+    )
+    alone = tmp_path / "alone.py"
+    alone.write_text(
+        REVISION.format(
+            body='    create_index_concurrently("ix_answers_text", "answers", ["text"])'
+        )
+    )
+
+    # when
+    findings = check_file(path)
+
+    # then
+    assert [finding.line for finding in findings] == [8]
+    assert "revision of its own" in findings[0].message
+    assert check_file(alone) == []
+
+
+def test_lock_timeout_after_other_ddl_flagged(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path,
+        """    op.create_table("votes", sa.Column("id", sa.Integer(), primary_key=True))
+    with_lock_timeout(lambda: op.drop_column("answers", "rank"))""",
+    )
+    first = tmp_path / "first.py"
+    first.write_text(
+        REVISION.format(
+            body="""    with_lock_timeout(lambda: op.drop_column("answers", "rank"))
+    op.create_table("votes", sa.Column("id", sa.Integer(), primary_key=True))"""
+        )
+    )
+
+    # when
+    findings = check_file(path)
+
+    # then
+    assert [finding.line for finding in findings] == [8]
+    assert "first operation" in findings[0].message
+    assert check_file(first) == []
+
+
+def test_concurrently_inside_transaction_flagged(tmp_path):
+    # given
+    path = write_revision(
+        tmp_path,
+        """    op.create_index(
+        "ix_answers_text", "answers", ["text"], postgresql_concurrently=True
+    )""",
+    )
+
+    # when
+    findings = check_file(path)
+
+    # then
+    assert [finding.line for finding in findings] == [7]
+    assert "create_index_concurrently" in findings[0].message
@@ -0,0 +1,122 @@
+import asyncio
+import re
+
+import pytest
+from fastapi import status
+
+from src.app import profiling
+
+TOKEN = {"X-Admin-Token": "secret"}
+COLLAPSED_LINE = re.compile(r"^\S.* \d+$")
+
+retained = []
+
+
+@pytest.fixture()
+def admin_token(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+
+
+@pytest.mark.asyncio
+async def test_profiling_disabled_without_token(client, monkeypatch):
+    # given
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", None)
+
+    # when
+    response = await client.get("/admin/profile/cpu?seconds=0.1", headers=TOKEN)
+
+    # then
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_profiling_wrong_token(client, admin_token):
+    # when
+    missing = await client.get("/admin/profile/cpu?seconds=0.1")
+    wrong = await client.get(
+        "/admin/profile/cpu?seconds=0.1", headers={"X-Admin-Token": "wrong"}
+    )
+    non_ascii = await client.get(
+        "/admin/profile/cpu?seconds=0.1",
+        headers={"X-Admin-Token": "s\xe9cret".encode("latin-1")},
+    )
+
+    # then
+    assert missing.status_code == status.HTTP_403_FORBIDDEN
+    assert wrong.status_code == status.HTTP_403_FORBIDDEN
+    assert non_ascii.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_profile_cpu(client, admin_token):
+    # when
+    response = await client.get(
+        "/admin/profile/cpu?seconds=0.2&interval_ms=2", headers=TOKEN
+    )
+    lines = response.text.splitlines()
+
+    # then
+    assert response.status_code == status.HTTP_200_OK
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert lines
+    assert all(COLLAPSED_LINE.match(line) for line in lines)
+    assert any(line.startswith("MainThread;") for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_profile_memory(client, admin_token):
+    # given
+    async def allocate():
+        await asyncio.sleep(0.05)
+        retained.append([bytearray(100) for _ in range(10000)])
+
+    # when
+    response, _ = await asyncio.gather(
+        client.get("/admin/profile/memory?seconds=0.3", headers=TOKEN), allocate()
+    )
+    retained.clear()
+
+    # then
+    assert response.status_code == status.HTTP_200_OK
+    top = response.text.splitlines()[0]
+    assert "test_profiling.py" in top
+    assert int(top.rsplit(" ", 1)[1]) > 100 * 10000
+
+
+@pytest.mark.asyncio
+async def test_profile_allocations(client, admin_token):
+    # given
+    async def traffic():
+        await asyncio.sleep(0.05)
+        for _ in range(3):
+            await client.get("/tags/")
+        await client.get("/questions/0")
+
+    # when
+    response, _ = await asyncio.gather(
+        client.get("/admin/profile/allocations?seconds=0.5", headers=TOKEN),
+        traffic(),
+    )
+    routes = response.json()["routes"]
+
+    # then
+    assert response.status_code == status.HTTP_200_OK
+    assert set(routes) == {"GET /tags/", "GET /questions/{question_id}"}
+    assert routes["GET /tags/"]["requests"] == 3
+    assert routes["GET /tags/"]["solo_requests"] == 3
+    assert routes["GET /tags/"]["peak_bytes_per_request"] > 0
+    assert not profiling.route_allocations.active
+
+
+@pytest.mark.asyncio
+async def test_one_capture_at_a_time(client, admin_token):
+    # when
+    first, second = await asyncio.gather(
+        client.get("/admin/profile/cpu?seconds=0.3", headers=TOKEN),
+        client.get("/admin/profile/memory?seconds=0.1", headers=TOKEN),
+    )
+
+    # then
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_409_CONFLICT
+    assert second.json()["detail"] == "capture_in_progress"